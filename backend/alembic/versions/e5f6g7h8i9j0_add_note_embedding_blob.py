@@ -0,0 +1,27 @@
+"""add_note_embedding_blob
+
+Revision ID: e5f6g7h8i9j0
+Revises: d4e5f6g7h8i9
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f6g7h8i9j0'
+down_revision: Union[str, None] = 'd4e5f6g7h8i9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Only populated on SQLite; Postgres keeps using the pgvector column.
+    op.add_column('note_embeddings', sa.Column('embedding_blob', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('note_embeddings', 'embedding_blob')
@@ -0,0 +1,75 @@
+"""add_note_tags
+
+Revision ID: f6g7h8i9j0k1
+Revises: e5f6g7h8i9j0
+Create Date: 2026-10-15 12:30:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6g7h8i9j0k1'
+down_revision: Union[str, None] = 'e5f6g7h8i9j0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _parse_tags(value: str) -> list[str]:
+    # Same tolerance as the app's _deserialize_tags: bad JSON or a non-list is no tags.
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return []
+    if not isinstance(parsed, list):
+        return []
+    return [tag for tag in parsed if isinstance(tag, str)]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'note_tags',
+        sa.Column('note_id', sa.String(36), sa.ForeignKey('notes.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('tag', sa.Text(), nullable=False),
+        sa.Column('user_id', sa.String(255), nullable=False),
+        sa.PrimaryKeyConstraint('note_id', 'tag'),
+    )
+    op.create_index('idx_note_tags_user_tag', 'note_tags', ['user_id', 'tag'])
+    op.create_index('idx_note_tags_note_id', 'note_tags', ['note_id'])
+
+    # Backfill from the JSON tags column.
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Parsed in Python: a ::jsonb cast would abort the migration on the first row
+        # whose tags are not valid JSON, which the app itself reads as no tags.
+        notes = sa.table('notes', sa.column('id'), sa.column('user_id'), sa.column('tags'))
+        note_tags = sa.table(
+            'note_tags', sa.column('note_id'), sa.column('tag'), sa.column('user_id')
+        )
+        rows = []
+        for note_id, user_id, tags in bind.execute(
+            sa.select(notes.c.id, notes.c.user_id, notes.c.tags).where(notes.c.tags.isnot(None))
+        ):
+            for tag in dict.fromkeys(_parse_tags(tags)):
+                rows.append({'note_id': note_id, 'tag': tag, 'user_id': user_id})
+        if rows:
+            bind.execute(sa.insert(note_tags), rows)
+    else:
+        op.execute(
+            """
+            INSERT OR IGNORE INTO note_tags (note_id, tag, user_id)
+            SELECT n.id, j.value, n.user_id
+            FROM notes n, json_each(n.tags) AS j
+            WHERE n.tags IS NOT NULL AND json_valid(n.tags) AND j.type = 'text'
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_note_tags_note_id', table_name='note_tags')
+    op.drop_index('idx_note_tags_user_tag', table_name='note_tags')
+    op.drop_table('note_tags')
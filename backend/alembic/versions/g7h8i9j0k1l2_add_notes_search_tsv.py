@@ -0,0 +1,43 @@
+"""add_notes_search_tsv
+
+Revision ID: g7h8i9j0k1l2
+Revises: f6g7h8i9j0k1
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'g7h8i9j0k1l2'
+down_revision: Union[str, None] = 'f6g7h8i9j0k1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Postgres only: SQLite full-text search goes through the notes_fts FTS5 table.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Same weighted document _search_notes_postgres used to build per row at query time.
+    op.execute(
+        """
+        ALTER TABLE notes ADD COLUMN search_tsv tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(content, '')), 'B')
+            || setweight(to_tsvector('english', coalesce(tags::text, '')), 'C')
+        ) STORED
+        """
+    )
+    op.execute('CREATE INDEX idx_notes_search_tsv ON notes USING GIN (search_tsv)')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('DROP INDEX IF EXISTS idx_notes_search_tsv')
+    op.execute('ALTER TABLE notes DROP COLUMN IF EXISTS search_tsv')
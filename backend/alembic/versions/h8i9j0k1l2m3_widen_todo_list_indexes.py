@@ -0,0 +1,33 @@
+"""widen_todo_list_indexes
+
+Revision ID: h8i9j0k1l2m3
+Revises: g7h8i9j0k1l2
+Create Date: 2026-10-15 14:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'h8i9j0k1l2m3'
+down_revision: Union[str, None] = 'g7h8i9j0k1l2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # list_todos(status=...) and list_todos_for_note() order by created_at DESC; with it
+    # as the trailing key the rows come back in index order (scanned backwards).
+    op.create_index('idx_todos_user_status_created', 'todos', ['user_id', 'status', 'created_at'])
+    op.create_index('idx_todos_user_note_created', 'todos', ['user_id', 'note_id', 'created_at'])
+    op.drop_index('idx_todos_user_status', table_name='todos')
+    op.drop_index('idx_todos_user_note', table_name='todos')
+
+
+def downgrade() -> None:
+    op.create_index('idx_todos_user_status', 'todos', ['user_id', 'status'])
+    op.create_index('idx_todos_user_note', 'todos', ['user_id', 'note_id'])
+    op.drop_index('idx_todos_user_note_created', table_name='todos')
+    op.drop_index('idx_todos_user_status_created', table_name='todos')
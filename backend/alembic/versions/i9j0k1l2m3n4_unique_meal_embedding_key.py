@@ -0,0 +1,54 @@
+"""unique_meal_embedding_key
+
+Revision ID: i9j0k1l2m3n4
+Revises: h8i9j0k1l2m3
+Create Date: 2026-10-15 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'i9j0k1l2m3n4'
+down_revision: Union[str, None] = 'h8i9j0k1l2m3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # upsert_meal_embedding() uses ON CONFLICT on this key, which needs a unique index.
+    # Keep one row (the most recently updated on Postgres) for any key written twice.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            """
+            DELETE FROM meal_embeddings a
+            USING meal_embeddings b
+            WHERE a.user_id = b.user_id
+              AND a.meal_entry_id = b.meal_entry_id
+              AND a.embedding_model = b.embedding_model
+              AND (a.updated_at, a.id) < (b.updated_at, b.id)
+            """
+        )
+    else:
+        op.execute(
+            """
+            DELETE FROM meal_embeddings WHERE rowid NOT IN (
+                SELECT MAX(rowid) FROM meal_embeddings
+                GROUP BY user_id, meal_entry_id, embedding_model
+            )
+            """
+        )
+    op.create_index(
+        'idx_meal_embeddings_user_meal_model',
+        'meal_embeddings',
+        ['user_id', 'meal_entry_id', 'embedding_model'],
+        unique=True,
+    )
+    op.drop_index('idx_meal_embeddings_user_meal', table_name='meal_embeddings')
+
+
+def downgrade() -> None:
+    op.create_index('idx_meal_embeddings_user_meal', 'meal_embeddings', ['user_id', 'meal_entry_id'])
+    op.drop_index('idx_meal_embeddings_user_meal_model', table_name='meal_embeddings')
@@ -0,0 +1,33 @@
+"""widen_meal_date_index
+
+Revision ID: j0k1l2m3n4o5
+Revises: i9j0k1l2m3n4
+Create Date: 2026-10-15 16:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'j0k1l2m3n4o5'
+down_revision: Union[str, None] = 'i9j0k1l2m3n4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # list_meals_by_date_range() filters a meal_date range and orders by
+    # meal_date DESC, created_at DESC; the trailing created_at lets the index serve the sort.
+    op.create_index(
+        'idx_meal_entries_user_date_created',
+        'meal_entries',
+        ['user_id', 'meal_date', 'created_at'],
+    )
+    op.drop_index('idx_meal_entries_user_date', table_name='meal_entries')
+
+
+def downgrade() -> None:
+    op.create_index('idx_meal_entries_user_date', 'meal_entries', ['user_id', 'meal_date'])
+    op.drop_index('idx_meal_entries_user_date_created', table_name='meal_entries')
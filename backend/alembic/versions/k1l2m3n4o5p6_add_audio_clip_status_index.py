@@ -0,0 +1,31 @@
+"""add_audio_clip_status_index
+
+Revision ID: k1l2m3n4o5p6
+Revises: j0k1l2m3n4o5
+Create Date: 2026-10-15 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'k1l2m3n4o5p6'
+down_revision: Union[str, None] = 'j0k1l2m3n4o5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # list_stale_pending_audio_clips() range-scans one user's pending clips by age;
+    # with only (user_id, created_at) it had to step over every older ready clip.
+    op.create_index(
+        'idx_audio_clips_user_status_created',
+        'audio_clips',
+        ['user_id', 'status', 'created_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_audio_clips_user_status_created', table_name='audio_clips')
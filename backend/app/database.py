@@ -5,6 +5,7 @@ These definitions power both Alembic migrations and runtime ORM queries.
 """
 
 import os
+import sqlite3
 from collections.abc import Generator
 from contextlib import contextmanager
 
@@ -17,9 +18,11 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
     String,
     Text,
     Time,
+    UniqueConstraint,
     create_engine,
     event,
 )
@@ -72,6 +75,30 @@ class Note(Base):
     )
 
 
+class NoteTag(Base):
+    """
+    One row per (note, tag), kept in sync with the Note.tags JSON by NoteStorage.
+
+    Lets tag filters and tag listings use an index instead of scanning and
+    parsing every note's tags JSON.
+    """
+
+    __tablename__ = "note_tags"
+
+    note_id = Column(
+        String(36),
+        ForeignKey("notes.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    tag = Column(Text, primary_key=True)
+    user_id = Column(String(255), nullable=False)
+
+    __table_args__ = (
+        Index("idx_note_tags_user_tag", "user_id", "tag"),
+        Index("idx_note_tags_note_id", "note_id"),
+    )
+
+
 class Digest(Base):
     """
     Digest table for storing generated summaries of notes.
@@ -157,6 +184,9 @@ class NoteEmbedding(Base):
     embedding_model = Column(String(100), nullable=False)
     content_hash = Column(String(64), nullable=False)
     embedding = Column(VectorEmbedding(1536), nullable=False)
+    # SQLite only: packed little-endian float32 copy of `embedding`, read with
+    # np.frombuffer instead of parsing JSON. NULL on Postgres and for older rows.
+    embedding_blob = Column(LargeBinary, nullable=True)
 
     created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
     updated_at = Column(
@@ -164,6 +194,10 @@ class NoteEmbedding(Base):
     )
 
     __table_args__ = (
+        # Matches migration 025497cfb4da; the target of upsert_note_embedding's ON CONFLICT.
+        UniqueConstraint(
+            "user_id", "note_id", "embedding_model", name="uq_note_embeddings_user_note_model"
+        ),
         Index("idx_note_embeddings_user_note", "user_id", "note_id"),
         Index("idx_note_embeddings_user_model", "user_id", "embedding_model"),
         Index("idx_note_embeddings_user_updated", "user_id", "updated_at"),
@@ -201,6 +235,7 @@ class AudioClip(Base):
         Index("idx_audio_clips_user_id", "user_id"),
         Index("idx_audio_clips_user_note", "user_id", "note_id"),
         Index("idx_audio_clips_user_created", "user_id", "created_at"),
+        Index("idx_audio_clips_user_status_created", "user_id", "status", "created_at"),
     )
 
 
@@ -257,8 +292,10 @@ class Todo(Base):
 
     __table_args__ = (
         Index("idx_todos_user_id", "user_id"),
-        Index("idx_todos_user_status", "user_id", "status"),
-        Index("idx_todos_user_note", "user_id", "note_id"),
+        # Trailing created_at lets the filtered, newest-first listings read rows in
+        # index order instead of sorting.
+        Index("idx_todos_user_status_created", "user_id", "status", "created_at"),
+        Index("idx_todos_user_note_created", "user_id", "note_id", "created_at"),
         Index("idx_todos_user_created", "user_id", "created_at"),
     )
 
@@ -293,7 +330,7 @@ class MealEntry(Base):
 
     __table_args__ = (
         Index("idx_meal_entries_user_id", "user_id"),
-        Index("idx_meal_entries_user_date", "user_id", "meal_date"),
+        Index("idx_meal_entries_user_date_created", "user_id", "meal_date", "created_at"),
         Index("idx_meal_entries_user_type", "user_id", "meal_type"),
         Index("idx_meal_entries_user_created", "user_id", "created_at"),
     )
@@ -350,7 +387,13 @@ class MealEmbedding(Base):
     )
 
     __table_args__ = (
-        Index("idx_meal_embeddings_user_meal", "user_id", "meal_entry_id"),
+        Index(
+            "idx_meal_embeddings_user_meal_model",
+            "user_id",
+            "meal_entry_id",
+            "embedding_model",
+            unique=True,
+        ),
         Index("idx_meal_embeddings_user_model", "user_id", "embedding_model"),
     )
 
@@ -511,7 +554,12 @@ def get_session() -> Generator[Session, None, None]:
 
 
 def create_engine_for_url(database_url: str | None = None) -> Engine:
-    """Build a SQLAlchemy engine for the given URL (or default environment)."""
+    """
+    Build a SQLAlchemy engine for the given URL (or default environment).
+
+    Args:
+        database_url: Connection string; defaults to get_database_url().
+    """
     url = database_url or get_database_url()
     engine = create_engine(
         url,
@@ -522,18 +570,80 @@ def create_engine_for_url(database_url: str | None = None) -> Engine:
 
     if engine.dialect.name == "sqlite":
         event.listen(engine, "connect", _set_sqlite_pragmas)
+        event.listen(engine, "connect", _load_sqlite_vec)
 
     return engine
 
 
+def embeddings_unlogged_requested() -> bool:
+    """True if the EMBEDDINGS_UNLOGGED env var asks for an UNLOGGED note_embeddings."""
+    raw = (os.getenv("EMBEDDINGS_UNLOGGED", "false") or "").strip().lower()
+    return raw in {"1", "true", "yes", "on"}
+
+
+def set_embeddings_unlogged(engine: Engine) -> bool:
+    """
+    Make note_embeddings UNLOGGED so embedding writes skip the WAL.
+
+    Embeddings are derived data (notes + embedding model), so this trades durability
+    for write speed: after a crash PostgreSQL truncates the table, and semantic search
+    only sees notes again once they are re-embedded (FTS is unaffected). UNLOGGED
+    tables are also not replicated to standbys. `notes` itself is never changed.
+
+    The ALTER takes an ACCESS EXCLUSIVE lock and rewrites the table, so it is run
+    once per deploy by migrate.py, never from app processes. Only rewrites the table
+    when it is still permanent. To revert, run `ALTER TABLE note_embeddings SET
+    LOGGED` manually.
+
+    Returns:
+        True if the table was converted.
+    """
+    if engine.dialect.name != "postgresql":
+        return False
+    with engine.begin() as conn:
+        persistence = conn.exec_driver_sql(
+            "SELECT relpersistence FROM pg_class WHERE oid = to_regclass('note_embeddings')"
+        ).scalar()
+        if persistence != "p":
+            return False
+        conn.exec_driver_sql("ALTER TABLE note_embeddings SET UNLOGGED")
+    return True
+
+
 def _set_sqlite_pragmas(dbapi_connection, connection_record):
     """
-    Apply SQLite pragmas for better consistency (WAL, foreign keys).
-    
-    This mirrors the previous manual adapter initialization logic.
+    Apply SQLite pragmas for consistency and write throughput.
+
+    WAL with synchronous=NORMAL syncs the log once per checkpoint instead of on
+    every commit; a committed transaction can only be lost on power failure, never
+    corrupted. mmap_size (256 MiB) and cache_size (-65536 = 64 MiB) keep hot pages
+    of the notes/FTS tables in memory for list and search endpoints.
     """
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-65536")
     cursor.close()
 
+
+def _load_sqlite_vec(dbapi_connection, connection_record):
+    """
+    Load the optional sqlite-vec extension (`pip install asr-backend[sqlite-vec]`).
+
+    When present, SQLite semantic search ranks embeddings in SQL instead of NumPy.
+    Silently skipped if the package is missing or the interpreter's sqlite3 module
+    was built without extension loading.
+    """
+    try:
+        import sqlite_vec
+    except ImportError:
+        return
+    try:
+        dbapi_connection.enable_load_extension(True)
+        sqlite_vec.load(dbapi_connection)
+        dbapi_connection.enable_load_extension(False)
+    except (AttributeError, sqlite3.Error):
+        return
@@ -432,17 +432,21 @@ def transcribe():
                 user_settings = svc.storage.get_user_settings(user_id)
                 todo_status = "accepted" if user_settings.auto_accept_todos else "suggested"
 
-                for extracted in extracted_todos:
-                    todo = svc.storage.create_todo(
-                        user_id=user_id,
-                        title=extracted.title,
-                        note_id=note_id,
-                        description=extracted.description,
-                        status=todo_status,
-                        confidence=extracted.confidence,
-                        extraction_context=text[:500] if text else None,
-                    )
-                    created_todos.append(todo.model_dump())
+                todos = svc.storage.create_todos_bulk(
+                    user_id,
+                    [
+                        {
+                            "title": extracted.title,
+                            "note_id": note_id,
+                            "description": extracted.description,
+                            "status": todo_status,
+                            "confidence": extracted.confidence,
+                            "extraction_context": text[:500] if text else None,
+                        }
+                        for extracted in extracted_todos
+                    ],
+                )
+                created_todos = [todo.model_dump() for todo in todos]
         except Exception as e:
             # Do not fail the transcription flow if todo creation fails.
             print(f"Todo creation failed for note {note_id}: {e}")
@@ -776,24 +780,20 @@ def update_note(note_id: str):
             model_version=note.model_version,
         )
 
-        success = svc.storage.update_note(user_id, note_id, content, metadata)
+        updated_note = svc.storage.update_note_returning(user_id, note_id, content, metadata)
 
-        if not success:
+        if not updated_note:
             return jsonify({"error": "Failed to update note"}), 500
 
-        # Return updated note
-        updated_note = svc.storage.get_note(user_id, note_id)
-
         # Best-effort embedding refresh
-        if updated_note:
-            svc.embeddings.upsert_for_note(
-                storage=svc.storage,
-                user_id=user_id,
-                note_id=updated_note.id,
-                title=updated_note.title,
-                content=updated_note.content,
-                tags=updated_note.tags,
-            )
+        svc.embeddings.upsert_for_note(
+            storage=svc.storage,
+            user_id=user_id,
+            note_id=updated_note.id,
+            title=updated_note.title,
+            content=updated_note.content,
+            tags=updated_note.tags,
+        )
 
         return jsonify(updated_note.model_dump())
 
@@ -818,22 +818,19 @@ def delete_note(note_id: str):
         warning = None
         if Config.audio_clips_enabled():
             try:
-                clips = svc.storage.list_audio_clips_for_note(user_id, note_id)
-                for clip in clips:
-                    try:
-                        s3_audio.delete_object(storage_key=clip.storage_key)
-                    except Exception as e:
-                        # Keep the UX simple: note deletion still succeeds; we may retry later via opportunistic cleanup.
-                        warning = f"Failed to delete one or more audio objects: {e}"
-            except Exception as e:
-                warning = f"Failed to list/delete note audio clips: {e}"
-
-            try:
-                svc.storage.delete_audio_clips_for_note(user_id, note_id)
+                # One round-trip: remove the clip rows and get their storage keys back.
+                deleted_clips = svc.storage.delete_audio_clips_returning(user_id, note_id=note_id)
             except Exception as e:
                 # If we can't delete clip rows, abort the note deletion to avoid a confusing half-state.
                 return jsonify({"error": f"Failed to delete note audio clips: {e}"}), 500
 
+            for clip in deleted_clips:
+                try:
+                    s3_audio.delete_object(storage_key=clip["storage_key"])
+                except Exception as e:
+                    # Keep the UX simple: note deletion still succeeds.
+                    warning = f"Failed to delete one or more audio objects: {e}"
+
         success = svc.storage.delete_note(user_id, note_id)
 
         if not success:
@@ -1820,6 +1817,7 @@ def list_meals():
         - start_date: Start date in ISO format (required)
         - end_date: End date in ISO format (required)
         - meal_type: Filter by type (optional)
+        - include_transcription: "false" to omit transcription text (default: true)
         - limit: Max results (default: 100)
         - offset: Pagination offset (default: 0)
 
@@ -1837,6 +1835,10 @@ def list_meals():
             return api_error("Query params 'start_date' and 'end_date' are required", 400)
 
         meal_type = request.args.get("meal_type")
+        include_transcription = (
+            request.args.get("include_transcription", "true").strip().lower()
+            not in {"0", "false", "no", "off"}
+        )
         limit, offset = parse_pagination(default_limit=100, max_limit=500)
 
         meals = svc.storage.list_meals_by_date_range(
@@ -1846,6 +1848,7 @@ def list_meals():
             meal_type=meal_type,
             limit=limit,
             offset=offset,
+            include_transcription=include_transcription,
         )
 
         return jsonify({
@@ -8,19 +8,58 @@ and PostgreSQL (including full-text search helpers).
 
 from __future__ import annotations
 
+import heapq
 import json
+import re
+import threading
+import time
+from collections import OrderedDict
 from collections.abc import Generator, Mapping
 from contextlib import contextmanager
-from datetime import datetime
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime, timedelta
+from datetime import date as dt_date
+from datetime import time as dt_time
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import Any
+from typing import Any, Generic, TypeVar
 from uuid import uuid4
 
-from sqlalchemy import Text, bindparam, cast, desc, func, or_, text
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.engine import Engine
-from sqlalchemy.exc import OperationalError
+import numpy as np
+from sqlalchemy import (
+    ARRAY,
+    Float,
+    Select,
+    Text,
+    and_,
+    any_,
+    bindparam,
+    case,
+    cast,
+    delete,
+    desc,
+    exists,
+    func,
+    insert,
+    lambda_stmt,
+    literal,
+    literal_column,
+    or_,
+    select,
+    text,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection, Engine, Row
+from sqlalchemy.exc import DatabaseError, OperationalError
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 
 from ..database import (
     AskHistory as AskHistoryORM,
@@ -55,13 +94,15 @@ from ..database import (
 from ..database import (
     NoteEmbedding as NoteEmbeddingORM,
 )
+from ..database import (
+    NoteTag as NoteTagORM,
+)
 from ..database import (
     Todo as TodoORM,
 )
 from ..database import (
     UserSettings as UserSettingsORM,
 )
-from .embeddings import vector_from_json
 from .models import (
     AskHistory as AskHistoryDTO,
 )
@@ -97,46 +138,117 @@ from .models import (
     UserSettings as UserSettingsDTO,
 )
 
-SQLITE_FTS_STATEMENTS = [
+# engine URL -> (active FTS table, time.monotonic() when last verified)
+_SQLITE_SCHEMA_CACHE: dict[str, tuple[str, float]] = {}
+_SQLITE_SCHEMA_TTL_SECONDS = 300.0
+_SQLITE_SCHEMA_LOCK = threading.Lock()
+
+# engine URL -> (engine, session factory), least recently used first. An evicted engine
+# is disposed so its pooled connections are closed rather than leaked.
+_ENGINES: OrderedDict[str, tuple[Engine, sessionmaker]] = OrderedDict()
+_ENGINES_MAX_ENTRIES = 32
+_ENGINES_LOCK = threading.Lock()
+
+# Semantic cache for retrieve_for_question: a repeat of a question whose embedding is
+# this close (query-to-query cosine) to a cached one reuses the cached results.
+_RETRIEVAL_CACHE_SIMILARITY = 0.92
+_RETRIEVAL_CACHE_TTL_SECONDS = 300.0
+_RETRIEVAL_CACHE_MAX_ENTRIES = 512
+
+# Per-user caches (embedding matrices, folder trees) keep the most recently used
+# entries only; an evicted user just pays one rebuild on their next request.
+_USER_CACHE_MAX_ENTRIES = 512
+
+_ModelT = TypeVar("_ModelT")
+_KeyT = TypeVar("_KeyT")
+_ValueT = TypeVar("_ValueT")
+
+
+class _LRUCache(Generic[_KeyT, _ValueT]):
     """
-    CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
-        note_id UNINDEXED,
-        title,
-        content,
-        tags,
-        tokenize = 'porter ascii'
-    )
-    """,
+    Least-recently-used map capped at _USER_CACHE_MAX_ENTRIES.
+
+    NoteStorage is shared across request threads, so every read and write of the
+    ordering happens under the cache's own lock.
+    """
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[_KeyT, _ValueT] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: _KeyT) -> _ValueT | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: _KeyT, value: _ValueT) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > _USER_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def keys(self) -> list[_KeyT]:
+        with self._lock:
+            return list(self._entries)
+
+
+@dataclass(frozen=True)
+class _EmbeddingMatrix:
+    """
+    Row-normalized float32 embeddings for one (user, model) pair.
+
+    `watermark` is the (row count, max updated_at) seen when the matrix was built;
+    a mismatch on the next search means rows were added, changed, or deleted. None
+    marks a matrix this process knows to be stale. `content_hashes` lines up with
+    `note_ids` so a rebuild can keep every row whose hash is unchanged.
     """
-    CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
-        INSERT INTO notes_fts(note_id, title, content, tags)
-        VALUES (new.id, new.title, new.content, new.tags);
-    END
-    """,
+
+    watermark: tuple[Any, ...] | None
+    note_ids: list[str]
+    row_by_note_id: dict[str, int]
+    matrix: np.ndarray
+    content_hashes: list[str]
+
+
+@dataclass
+class _RetrievalCacheBucket:
     """
-    CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
-        UPDATE notes_fts SET
-            note_id = new.id,
-            title = new.title,
-            content = new.content,
-            tags = new.tags
-        WHERE note_id = old.id;
-    END
-    """,
+    Cached retrieve_for_question results for one (user, filters, limit, model) key.
+
+    Row i of `vectors` (L2-normalized float16 query embeddings) pairs with
+    `expires_at[i]` and `results[i]`. The bucket is dropped as soon as `watermark`
+    (notes + embeddings count/updated_at) no longer matches the database.
     """
-    CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
-        DELETE FROM notes_fts WHERE note_id = old.id;
-    END
-    """,
-]
 
-_SQLITE_SCHEMA_CACHE: dict[str, str] = {}
+    watermark: tuple[Any, ...]
+    vectors: np.ndarray
+    expires_at: list[float]
+    results: list[list[Mapping[str, Any]]]
+
+
+try:  # optional: pip install asr-backend[orjson]
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # orjson.JSONDecodeError subclasses ValueError, so callers catch the same error.
+    _json_loads = orjson.loads
+
+    def _json_dumps(value: Any) -> str:
+        return orjson.dumps(value).decode()
+else:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
 
 
 def _serialize_tags(tags: list[str]) -> str | None:
     if not tags:
         return None
-    return json.dumps(tags)
+    return _json_dumps(tags)
 
 
 def _deserialize_tags(value: Any) -> list[str]:
@@ -146,10 +258,51 @@ def _deserialize_tags(value: Any) -> list[str]:
         return value
     if isinstance(value, (bytes, bytearray)):
         value = value.decode()
-    try:
-        return json.loads(value)
-    except (TypeError, ValueError):
+    if not isinstance(value, str):
         return []
+    return list(_parse_tags_json(value))
+
+
+@lru_cache(maxsize=4096)
+def _parse_tags_json(value: str) -> tuple[str, ...]:
+    # Notes reuse a small set of tag lists, so most decodes are cache hits. The
+    # result is a tuple so callers can never mutate a cached value.
+    try:
+        parsed = _json_loads(value)
+    except ValueError:
+        return ()
+    return tuple(parsed) if isinstance(parsed, list) else ()
+
+
+def _note_tag_rows(user_id: str, note_id: str, tags: list[str] | None) -> list[dict[str, str]]:
+    return [
+        {"note_id": note_id, "tag": tag, "user_id": user_id}
+        for tag in dict.fromkeys(t for t in (tags or []) if t)
+    ]
+
+
+def _utcnow() -> datetime:
+    # Naive UTC, matching the TIMESTAMP (without time zone) columns; an aware value
+    # would be shifted by the Postgres session time zone and can't be compared with
+    # the naive datetimes read back from either backend.
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+# Meal endpoints see the same few date/time strings over and over (today, month
+# bounds, common clock times); both parses return immutable values.
+@lru_cache(maxsize=4096)
+def _parse_meal_date(value: str) -> dt_date:
+    return dt_date.fromisoformat(value)
+
+
+@lru_cache(maxsize=2048)
+def _parse_meal_time(value: str) -> dt_time | None:
+    """Parse "HH:MM" (extra ":SS" ignored); None when it isn't a valid time."""
+    try:
+        parts = value.split(":")
+        return dt_time(int(parts[0]), int(parts[1]))
+    except (ValueError, IndexError):
+        return None
 
 
 def _coerce_datetime(value: Any) -> datetime | None:
@@ -158,18 +311,63 @@ def _coerce_datetime(value: Any) -> datetime | None:
     if isinstance(value, datetime):
         return value
     if isinstance(value, str):
-        for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S"):
-            try:
-                return datetime.fromisoformat(value) if "T" in value else datetime.strptime(value, fmt)
-            except ValueError:
-                continue
+        # SQLite emits "YYYY-MM-DD HH:MM:SS[.ffffff]", which fromisoformat (C-implemented,
+        # space or "T" separator, any fraction length, optional "Z"/offset on 3.11+)
+        # parses directly; it accepts every layout the old strptime fallbacks did.
         try:
-            return datetime.fromisoformat(value.replace(" ", "T"))
+            return datetime.fromisoformat(value)
         except ValueError:
             return None
     return None
 
 
+_NOTE_DTO_COLUMNS = tuple(
+    NoteORM.__table__.c[name]
+    for name in (
+        "id",
+        "user_id",
+        "title",
+        "content",
+        "folder_path",
+        "tags",
+        "created_at",
+        "updated_at",
+        "word_count",
+        "confidence",
+        "transcription_duration",
+        "model_version",
+    )
+)
+
+# Retrieval callers only read the start of each note (the ask route keeps 2000
+# characters as the LLM excerpt), so retrieval fetches cut content in SQL.
+_RETRIEVAL_CONTENT_CHARS = 2000
+
+# A keyword query made only of these words carries no FTS signal (Postgres'
+# english config drops them anyway), so retrieval skips the FTS list for it.
+_FTS_STOPWORDS = frozenset(
+    {
+        "a", "about", "all", "an", "and", "any", "are", "as", "at", "be", "but", "by",
+        "can", "do", "does", "for", "from", "had", "has", "have", "how", "i", "if", "in",
+        "is", "it", "its", "me", "my", "no", "not", "of", "on", "or", "our", "so", "that",
+        "the", "their", "them", "then", "there", "these", "they", "this", "to", "was",
+        "we", "were", "what", "when", "where", "which", "who", "why", "will", "with",
+        "you", "your",
+    }
+)  # fmt: skip
+
+
+def _note_dto_columns(content_chars: int | None = None) -> tuple[Any, ...]:
+    """_NOTE_DTO_COLUMNS, optionally with content cut to its first `content_chars`."""
+    if content_chars is None:
+        return _NOTE_DTO_COLUMNS
+    content = NoteORM.__table__.c.content
+    return tuple(
+        func.substr(content, 1, content_chars).label("content") if col is content else col
+        for col in _NOTE_DTO_COLUMNS
+    )
+
+
 def _mapping_to_note(row: Mapping[str, Any]) -> NoteDTO:
     return NoteDTO(
         id=row["id"],
@@ -178,8 +376,8 @@ def _mapping_to_note(row: Mapping[str, Any]) -> NoteDTO:
         content=row["content"],
         folder_path=row["folder_path"],
         tags=_deserialize_tags(row.get("tags")),
-        created_at=_coerce_datetime(row.get("created_at")) or datetime.utcnow(),
-        updated_at=_coerce_datetime(row.get("updated_at")) or datetime.utcnow(),
+        created_at=_coerce_datetime(row.get("created_at")) or _utcnow(),
+        updated_at=_coerce_datetime(row.get("updated_at")) or _utcnow(),
         word_count=row.get("word_count") or 0,
         confidence=row.get("confidence"),
         transcription_duration=row.get("transcription_duration"),
@@ -204,7 +402,7 @@ def _note_to_dto(note: NoteORM) -> NoteDTO:
     )
 
 
-def _audio_clip_to_dto(clip: AudioClipORM) -> AudioClipDTO:
+def _audio_clip_to_dto(clip: AudioClipORM | Row[Any]) -> AudioClipDTO:
     return AudioClipDTO(
         id=clip.id,
         user_id=clip.user_id,
@@ -229,7 +427,7 @@ def _user_settings_to_dto(settings: UserSettingsORM) -> UserSettingsDTO:
     )
 
 
-def _todo_to_dto(todo: TodoORM) -> TodoDTO:
+def _todo_to_dto(todo: TodoORM | Row[Any]) -> TodoDTO:
     return TodoDTO(
         id=todo.id,
         user_id=todo.user_id,
@@ -245,7 +443,7 @@ def _todo_to_dto(todo: TodoORM) -> TodoDTO:
     )
 
 
-def _meal_item_to_dto(item: MealItemORM) -> MealItemDTO:
+def _meal_item_to_dto(item: MealItemORM | Row[Any]) -> MealItemDTO:
     return MealItemDTO(
         id=item.id,
         user_id=item.user_id,
@@ -257,7 +455,9 @@ def _meal_item_to_dto(item: MealItemORM) -> MealItemDTO:
     )
 
 
-def _meal_entry_to_dto(entry: MealEntryORM, items: list[MealItemORM] | None = None) -> MealEntryDTO:
+def _meal_entry_to_dto(
+    entry: MealEntryORM | Row[Any], items: list[MealItemORM] | list[Row[Any]] | None = None
+) -> MealEntryDTO:
     return MealEntryDTO(
         id=entry.id,
         user_id=entry.user_id,
@@ -275,82 +475,219 @@ def _meal_entry_to_dto(entry: MealEntryORM, items: list[MealItemORM] | None = No
 
 
 def _build_folder_tree(rows: list[Mapping[str, Any]]) -> FolderNode:
-    root = FolderNode(name="", path="", note_count=0)
+    # Rows are already one per distinct folder_path (GROUP BY in SQL). Each path only
+    # walks up to its nearest existing ancestor, and nodes are built with
+    # model_construct since every field comes from trusted values.
+    root = FolderNode.model_construct(name="", path="", note_count=0)
     folder_map: dict[str, FolderNode] = {"": root}
 
+    def _node(path: str) -> FolderNode:
+        node = folder_map.get(path)
+        if node is None:
+            parent_path, _, name = path.rpartition("/")
+            node = FolderNode.model_construct(name=name, path=path, note_count=0)
+            _node(parent_path).subfolders.append(node)
+            folder_map[path] = node
+        return node
+
     for row in rows:
         path = row[0]
         count = row[1]
         if not path:
             continue
-        parts = path.split("/")
-        current_path = ""
-        parent = root
-
-        for part in parts:
-            current_path = f"{current_path}/{part}".strip("/")
-            if current_path not in folder_map:
-                folder = FolderNode(name=part, path=current_path, note_count=0)
-                folder_map[current_path] = folder
-                parent.subfolders.append(folder)
-            parent = folder_map[current_path]
-        parent.note_count = count
+        _node("/".join(part for part in path.split("/") if part)).note_count = count
 
     return root
 
 
 def _sqlite_fts_statements(table_name: str) -> list[str]:
+    # External-content FTS5: postings are keyed by notes.rowid and column text is read
+    # back from `notes`, so the index stores no second copy of title/content/tags.
+    # The delete/update triggers use the FTS5 'delete' command, which must be given the
+    # old column values exactly as they were indexed.
+    # notes.id is TEXT, so rowid is implicit and VACUUM may renumber it; the schema
+    # bootstrap checks the index against `notes` and rebuilds it when they disagree.
     return [
         f"""
         CREATE VIRTUAL TABLE IF NOT EXISTS {table_name} USING fts5(
-            note_id UNINDEXED,
             title,
             content,
             tags,
+            content = 'notes',
+            content_rowid = 'rowid',
             tokenize = 'porter ascii'
         )
         """,
         f"""
         CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
-            INSERT INTO {table_name}(note_id, title, content, tags)
-            VALUES (new.id, new.title, new.content, new.tags);
+            INSERT INTO {table_name}(rowid, title, content, tags)
+            VALUES (new.rowid, new.title, new.content, new.tags);
         END
         """,
         f"""
-        CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
-            UPDATE {table_name} SET
-                note_id = new.id,
-                title = new.title,
-                content = new.content,
-                tags = new.tags
-            WHERE note_id = old.id;
+        CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE OF title, content, tags ON notes BEGIN
+            INSERT INTO {table_name}({table_name}, rowid, title, content, tags)
+            VALUES ('delete', old.rowid, old.title, old.content, old.tags);
+            INSERT INTO {table_name}(rowid, title, content, tags)
+            VALUES (new.rowid, new.title, new.content, new.tags);
         END
         """,
         f"""
         CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
-            DELETE FROM {table_name} WHERE note_id = old.id;
+            INSERT INTO {table_name}({table_name}, rowid, title, content, tags)
+            VALUES ('delete', old.rowid, old.title, old.content, old.tags);
         END
         """,
     ]
 
 
+SQLITE_FTS_STATEMENTS = _sqlite_fts_statements("notes_fts")
+SQLITE_FTS_TRIGGERS = ("notes_ai", "notes_au", "notes_ad")
+
+
+def _drop_fts_triggers(conn) -> None:
+    for trigger in SQLITE_FTS_TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def _create_or_update_triggers(conn, table_name: str) -> None:
+    # Ensure triggers point to the active FTS table.
+    _drop_fts_triggers(conn)
+    for statement in _sqlite_fts_statements(table_name)[1:]:
+        conn.exec_driver_sql(statement)
+
+
+# Columns added after a table first shipped. create_all() never alters existing tables,
+# and dev SQLite databases are not migrated with Alembic.
+_SQLITE_ADDED_COLUMNS = (("note_embeddings", "embedding_blob", "BLOB"),)
+
+
+def _add_missing_sqlite_columns(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for table_name, column_name, column_type in _SQLITE_ADDED_COLUMNS:
+            existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table_name})")}
+            if column_name not in existing:
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"
+                )
+
+
+# Indexes superseded by a wider composite in the models; dropped from existing databases.
+_SQLITE_DROPPED_INDEXES = (
+    "idx_todos_user_status",
+    "idx_todos_user_note",
+    "idx_meal_embeddings_user_meal",
+    "idx_meal_entries_user_date",
+)
+
+# Unique keys that ON CONFLICT upserts rely on, as (table, key columns). Tables created
+# before the key existed get it as a named unique index, after duplicate keys are
+# collapsed to the newest row.
+_SQLITE_UNIQUE_INDEX_KEYS = {
+    "idx_meal_embeddings_user_meal_model": (
+        "meal_embeddings",
+        ("user_id", "meal_entry_id", "embedding_model"),
+    ),
+    "uq_note_embeddings_user_note_model": (
+        "note_embeddings",
+        ("user_id", "note_id", "embedding_model"),
+    ),
+}
+
+
+def _sqlite_has_unique_key(conn: Connection, table_name: str, key: tuple[str, ...]) -> bool:
+    # Either a named unique index or the autoindex behind a UNIQUE table constraint.
+    for _, index_name, unique, *_ in conn.exec_driver_sql(f"PRAGMA index_list({table_name})"):
+        if unique:
+            info = conn.exec_driver_sql(f"PRAGMA index_info({index_name})").all()
+            if tuple(row[2] for row in info) == key:
+                return True
+    return False
+
+
+def _sync_sqlite_indexes(engine: Engine) -> None:
+    # create_all() only builds indexes for tables it creates itself.
+    with engine.begin() as conn:
+        for index_name in _SQLITE_DROPPED_INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name}")
+        for index_name, (table_name, key) in _SQLITE_UNIQUE_INDEX_KEYS.items():
+            if not _sqlite_has_unique_key(conn, table_name, key):
+                columns = ", ".join(key)
+                conn.exec_driver_sql(
+                    f"DELETE FROM {table_name} WHERE rowid NOT IN "
+                    f"(SELECT MAX(rowid) FROM {table_name} GROUP BY {columns})"
+                )
+                conn.exec_driver_sql(
+                    f"CREATE UNIQUE INDEX {index_name} ON {table_name} ({columns})"
+                )
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
 def _ensure_sqlite_schema(engine: Engine) -> str:
     """Create tables + FTS artifacts for SQLite if they do not exist.
 
+    Runs the full bootstrap once per engine URL per process; later calls are served
+    from _SQLITE_SCHEMA_CACHE.
+
     Returns:
         The active FTS table name (usually 'notes_fts', but may be 'notes_fts_live' if repaired).
     """
     cache_key = str(engine.url)
-    cached_table = _SQLITE_SCHEMA_CACHE.get(cache_key)
+    cached_table = _cached_sqlite_schema(engine, cache_key)
     if cached_table:
-        with engine.begin() as conn:
-            try:
-                conn.exec_driver_sql(f"SELECT 1 FROM {cached_table} LIMIT 1")
-                return cached_table
-            except Exception:
-                pass
+        return cached_table
+
+    # Serialize the bootstrap so threads constructing NoteStorage concurrently do not
+    # race each other's DDL; whoever waited re-checks the cache first.
+    with _SQLITE_SCHEMA_LOCK:
+        cached_table = _cached_sqlite_schema(engine, cache_key)
+        if cached_table:
+            return cached_table
+        active_table = _bootstrap_sqlite_schema(engine)
+        _SQLITE_SCHEMA_CACHE[cache_key] = (active_table, time.monotonic())
+        return active_table
+
+
+def _cached_sqlite_schema(engine: Engine, cache_key: str) -> str | None:
+    cached = _SQLITE_SCHEMA_CACHE.get(cache_key)
+    if not cached:
+        return None
+    cached_table, verified_at = cached
+    # Trust a recent verification without a round-trip.
+    if time.monotonic() - verified_at < _SQLITE_SCHEMA_TTL_SECONDS:
+        return cached_table
+    with engine.begin() as conn:
+        try:
+            conn.exec_driver_sql(f"SELECT 1 FROM {cached_table} LIMIT 1")
+        except Exception:
+            return None
+    _SQLITE_SCHEMA_CACHE[cache_key] = (cached_table, time.monotonic())
+    return cached_table
+
+
+def _bootstrap_sqlite_schema(engine: Engine) -> str:
+    with engine.connect() as conn:
+        had_note_tags = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'note_tags'"
+        ).first()
 
     Base.metadata.create_all(bind=engine)
+    _add_missing_sqlite_columns(engine)
+    _sync_sqlite_indexes(engine)
+
+    if not had_note_tags:
+        # Databases created before note_tags existed: backfill from the tags JSON.
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                """
+                INSERT OR IGNORE INTO note_tags (note_id, tag, user_id)
+                SELECT n.id, j.value, n.user_id
+                FROM notes n, json_each(n.tags) AS j
+                WHERE n.tags IS NOT NULL AND json_valid(n.tags) AND j.type = 'text'
+                """
+            )
 
     def _fts_is_healthy(conn) -> bool:
         try:
@@ -363,13 +700,12 @@ def _ensure_sqlite_schema(engine: Engine) -> str:
         except Exception:
             return False
 
-    def _create_or_update_triggers(conn, table_name: str) -> None:
-        # Ensure triggers point to the active FTS table.
-        conn.exec_driver_sql("DROP TRIGGER IF EXISTS notes_ai")
-        conn.exec_driver_sql("DROP TRIGGER IF EXISTS notes_au")
-        conn.exec_driver_sql("DROP TRIGGER IF EXISTS notes_ad")
-        for statement in _sqlite_fts_statements(table_name)[1:]:
-            conn.exec_driver_sql(statement)
+    def _fts_uses_external_content(conn, table_name: str) -> bool:
+        sql = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table_name,),
+        ).scalar()
+        return bool(sql) and "content_rowid" in sql
 
     def _repair_fts(conn) -> str:
         """
@@ -385,19 +721,14 @@ def _ensure_sqlite_schema(engine: Engine) -> str:
         active_table = "notes_fts_live"
 
         # Stop triggers to avoid failing writes during repair.
-        conn.exec_driver_sql("DROP TRIGGER IF EXISTS notes_ai")
-        conn.exec_driver_sql("DROP TRIGGER IF EXISTS notes_au")
-        conn.exec_driver_sql("DROP TRIGGER IF EXISTS notes_ad")
+        _drop_fts_triggers(conn)
 
         # Create/recreate the live FTS table.
         conn.exec_driver_sql(f"DROP TABLE IF EXISTS {active_table}")
         conn.exec_driver_sql(_sqlite_fts_statements(active_table)[0])
 
         # Backfill from existing notes table.
-        conn.exec_driver_sql(
-            f"INSERT INTO {active_table}(note_id, title, content, tags) "
-            "SELECT id, title, content, tags FROM notes"
-        )
+        conn.exec_driver_sql(f"INSERT INTO {active_table}({active_table}) VALUES('rebuild')")
 
         # Validate the rebuilt index works.
         conn.exec_driver_sql(f"SELECT count(*) FROM {active_table}").scalar_one()
@@ -408,6 +739,14 @@ def _ensure_sqlite_schema(engine: Engine) -> str:
         return active_table
 
     with engine.begin() as conn:
+        # A process that died inside NoteStorage.bulk_ingest() leaves the FTS triggers
+        # dropped and the index missing whatever was inserted; detect that before the
+        # CREATE TRIGGER IF NOT EXISTS statements below put them back.
+        trigger_count = conn.exec_driver_sql(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' "
+            "AND name IN ('notes_ai', 'notes_au', 'notes_ad')"
+        ).scalar_one()
+
         # Create canonical notes_fts if possible.
         for statement in _sqlite_fts_statements("notes_fts"):
             try:
@@ -420,14 +759,324 @@ def _ensure_sqlite_schema(engine: Engine) -> str:
         # If notes_fts is healthy, use it. Otherwise repair to notes_fts_live.
         active_table = "notes_fts" if _fts_is_healthy(conn) else _repair_fts(conn)
 
+        # Databases created before the external-content layout still carry a standalone
+        # notes_fts (with a note_id column); rebuild it once from the notes table.
+        if active_table == "notes_fts" and not _fts_uses_external_content(conn, "notes_fts"):
+            _drop_fts_triggers(conn)
+            conn.exec_driver_sql("DROP TABLE notes_fts")
+            conn.exec_driver_sql(_sqlite_fts_statements("notes_fts")[0])
+            conn.exec_driver_sql("INSERT INTO notes_fts(notes_fts) VALUES('rebuild')")
+
         # If notes_fts is healthy, ensure triggers point to it (might have been dropped by previous repairs).
         if active_table == "notes_fts":
             _create_or_update_triggers(conn, "notes_fts")
+            if trigger_count < len(SQLITE_FTS_TRIGGERS):
+                conn.exec_driver_sql("INSERT INTO notes_fts(notes_fts) VALUES('rebuild')")
+
+        # Postings are keyed by notes.rowid, which VACUUM may renumber (notes has no
+        # INTEGER PRIMARY KEY). integrity-check with rank=1 compares the index against
+        # the content table; a mismatch means the rowids moved, so rebuild.
+        try:
+            conn.exec_driver_sql(
+                f"INSERT INTO {active_table}({active_table}, rank) VALUES('integrity-check', 1)"
+            )
+        except DatabaseError:
+            conn.exec_driver_sql(f"INSERT INTO {active_table}({active_table}) VALUES('rebuild')")
 
-    _SQLITE_SCHEMA_CACHE[cache_key] = active_table
     return active_table
 
 
+def _semantic_search_sql(template: str, note_filter: bool) -> TextClause:
+    if not note_filter:
+        return text(template.format(where_extra=""))
+    return text(template.format(where_extra="AND note_id IN :note_ids")).bindparams(
+        bindparam("note_ids", expanding=True)
+    )
+
+
+# Built once so each call reuses the same TextClause (and SQLAlchemy's compiled cache
+# entry) instead of re-parsing a fresh f-string. Candidate filtering needs its own
+# statement because an expanding IN cannot be made optional.
+_PG_SEMANTIC_SEARCH_TEMPLATE = """
+    SELECT note_id,
+           (1.0 / (1.0 + (embedding <=> ((:qvec)::vector)))) AS score
+    FROM note_embeddings
+    WHERE user_id = :user_id
+      AND embedding_model = :embedding_model
+      {where_extra}
+    ORDER BY embedding <=> ((:qvec)::vector)
+    LIMIT :limit
+"""
+_PG_SEMANTIC_SEARCH_SQL = _semantic_search_sql(_PG_SEMANTIC_SEARCH_TEMPLATE, False)
+_PG_SEMANTIC_SEARCH_IN_NOTES_SQL = _semantic_search_sql(_PG_SEMANTIC_SEARCH_TEMPLATE, True)
+
+
+def _pg_semantic_search_in_select(
+    candidates: Select[tuple[str]],
+    user_id: str,
+    embedding_model: str,
+    qvec: str,
+    limit: int,
+) -> Select[Any]:
+    """
+    _PG_SEMANTIC_SEARCH_TEMPLATE restricted to a candidate SELECT, joined as a CTE so
+    the filter and the vector ranking run as one statement.
+    """
+    distance = NoteEmbeddingORM.embedding.op("<=>", return_type=Float())(
+        cast(literal(qvec), NoteEmbeddingORM.embedding.type)
+    )
+    filtered = candidates.cte("filtered")
+    return (
+        select(NoteEmbeddingORM.note_id, (1.0 / (1.0 + distance)).label("score"))
+        .join(filtered, filtered.c.id == NoteEmbeddingORM.note_id)
+        .where(
+            NoteEmbeddingORM.user_id == user_id,
+            NoteEmbeddingORM.embedding_model == embedding_model,
+        )
+        .order_by(distance)
+        .limit(limit)
+    )
+
+
+# Weighted Reciprocal Rank Fusion: only list positions matter, so cosine similarities
+# and bm25/ts_rank values never have to share a scale. Weights are scaled so a note
+# ranked first in both lists gets 1.0.
+_RRF_K = 10
+_RRF_SEMANTIC_WEIGHT = 0.7 * (_RRF_K + 1) / (0.7 + 0.3)
+_RRF_FTS_WEIGHT = 0.3 * (_RRF_K + 1) / (0.7 + 0.3)
+
+
+def _pg_hybrid_retrieve_select(
+    user_id: str,
+    embedding_model: str,
+    qvec: str,
+    fts_query: str,
+    candidates: Select[tuple[str]] | None,
+    semantic_k: int,
+    fts_k: int,
+    limit: int,
+) -> Select[Any]:
+    """
+    Semantic and FTS candidate lists fused with weighted RRF in one statement.
+
+    Only the fused top `limit` rows are joined back to notes, so ts_headline() runs
+    for those alone rather than for every FTS hit.
+    """
+    distance = NoteEmbeddingORM.embedding.op("<=>", return_type=Float())(
+        cast(literal(qvec), NoteEmbeddingORM.embedding.type)
+    )
+    ts_query = func.plainto_tsquery("english", fts_query)
+    fts_rank = func.ts_rank_cd(literal_column("notes.search_tsv"), ts_query)
+
+    sem_stmt = select(
+        NoteEmbeddingORM.note_id,
+        func.row_number().over(order_by=distance).label("r"),
+        (1.0 / (1.0 + distance)).label("score"),
+    ).where(
+        NoteEmbeddingORM.user_id == user_id,
+        NoteEmbeddingORM.embedding_model == embedding_model,
+    )
+    fts_stmt = select(
+        NoteORM.id.label("note_id"),
+        func.row_number().over(order_by=desc(fts_rank)).label("r"),
+        fts_rank.label("rank"),
+        func.max(fts_rank).over().label("max_rank"),
+    ).where(
+        NoteORM.user_id == user_id,
+        literal_column("notes.search_tsv").op("@@")(ts_query),
+    )
+    if candidates is not None:
+        filtered = candidates.cte("filtered")
+        sem_stmt = sem_stmt.join(filtered, filtered.c.id == NoteEmbeddingORM.note_id)
+        fts_stmt = fts_stmt.join(filtered, filtered.c.id == NoteORM.id)
+    sem = sem_stmt.order_by(distance).limit(semantic_k).cte("sem")
+    fts = fts_stmt.order_by(desc(fts_rank)).limit(fts_k).cte("fts")
+
+    fused_score = func.coalesce(_RRF_SEMANTIC_WEIGHT / (_RRF_K + sem.c.r), 0.0) + func.coalesce(
+        _RRF_FTS_WEIGHT / (_RRF_K + fts.c.r), 0.0
+    )
+    fused = (
+        select(
+            func.coalesce(sem.c.note_id, fts.c.note_id).label("note_id"),
+            fused_score.label("score"),
+            func.coalesce(sem.c.score, 0.0).label("semantic_score"),
+            func.coalesce(
+                fts.c.rank / func.coalesce(func.nullif(fts.c.max_rank, 0.0), 1.0), 0.0
+            ).label("fts_score"),
+            fts.c.note_id.isnot(None).label("fts_hit"),
+            # Ties keep semantic order first, then FTS order, as the SQLite path does.
+            func.coalesce(sem.c.r, semantic_k + fts.c.r).label("tiebreak"),
+        )
+        .select_from(sem.join(fts, sem.c.note_id == fts.c.note_id, full=True))
+        .order_by(desc("score"), "tiebreak")
+        .limit(limit)
+        .cte("fused")
+    )
+    snippet = case(
+        (
+            fused.c.fts_hit,
+            func.ts_headline(
+                "english", NoteORM.content, ts_query, "MaxWords=50, MinWords=25, ShortWord=3"
+            ),
+        ),
+        else_=None,
+    )
+    return (
+        select(
+            *_note_dto_columns(_RETRIEVAL_CONTENT_CHARS),
+            fused.c.score.label("fused_score"),
+            fused.c.semantic_score,
+            fused.c.fts_score,
+            snippet.label("fused_snippet"),
+        )
+        .join(fused, fused.c.note_id == NoteORM.id)
+        .where(NoteORM.user_id == user_id)
+        .order_by(desc(fused.c.score), fused.c.tiebreak)
+    )
+
+
+# Cosine distance in [0, 2] -> similarity in [0, 1], matching the NumPy path.
+# sqlite-vec takes a float32 BLOB as-is and parses TEXT as JSON, so rows written before
+# embedding_blob existed fall back to the JSON column.
+_SQLITE_VEC_SEARCH_TEMPLATE = """
+    SELECT note_id,
+           1.0 - vec_distance_cosine(COALESCE(embedding_blob, embedding), :qvec) / 2.0
+               AS score
+    FROM note_embeddings
+    WHERE user_id = :user_id
+      AND embedding_model = :embedding_model
+      AND vec_length(COALESCE(embedding_blob, embedding)) = :dims
+      {where_extra}
+    ORDER BY score DESC
+    LIMIT :limit
+"""
+_SQLITE_VEC_SEARCH_SQL = _semantic_search_sql(_SQLITE_VEC_SEARCH_TEMPLATE, False)
+_SQLITE_VEC_SEARCH_IN_NOTES_SQL = _semantic_search_sql(_SQLITE_VEC_SEARCH_TEMPLATE, True)
+
+_PG_DELETE_MEAL_ENTRY_SQL = text(
+    """
+    WITH dropped_embeddings AS (
+        DELETE FROM meal_embeddings WHERE user_id = :user_id AND meal_entry_id = :meal_id
+    )
+    DELETE FROM meal_entries WHERE user_id = :user_id AND id = :meal_id
+    RETURNING id
+    """
+)
+
+
+# bm25() column weights for (title, content, tags), inlined so the SQL text is fixed.
+# An explicit bm25() sorts the MATCH results itself rather than going through FTS5's
+# rank-ordered scan, which measured ~25% faster on queries with thousands of hits.
+_FTS_WEIGHT_TITLE = 5.0
+_FTS_WEIGHT_CONTENT = 1.0
+_FTS_WEIGHT_TAGS = 0.5
+
+
+@lru_cache(maxsize=8)
+def _sqlite_fts_search_sql(fts_table: str, note_filter: bool = False) -> TextClause:
+    # One TextClause per FTS table name (notes_fts, or notes_fts_live after a repair),
+    # built once rather than re-formatting the SQL on every search.
+    where_extra = "AND n.id IN :note_ids" if note_filter else ""
+    sql = text(
+        f"""
+        SELECT
+            n.id,
+            n.user_id,
+            n.title,
+            n.content,
+            n.folder_path,
+            n.tags,
+            n.created_at,
+            n.updated_at,
+            n.word_count,
+            n.confidence,
+            n.transcription_duration,
+            n.model_version,
+            bm25({fts_table}, {_FTS_WEIGHT_TITLE}, {_FTS_WEIGHT_CONTENT}, {_FTS_WEIGHT_TAGS})
+                AS rank,
+            snippet({fts_table}, 1, '<mark>', '</mark>', '...', 50) AS snippet
+        FROM {fts_table}
+        JOIN notes n ON {fts_table}.rowid = n.rowid
+        WHERE n.user_id = :user_id AND {fts_table} MATCH :match_query
+          {where_extra}
+        ORDER BY rank
+        LIMIT :limit
+        """
+    )
+    return sql.bindparams(bindparam("note_ids", expanding=True)) if note_filter else sql
+
+
+_PG_DELETE_NOTE_SQL = text(
+    """
+    WITH dropped_embeddings AS (
+        DELETE FROM note_embeddings WHERE user_id = :user_id AND note_id = :note_id
+    )
+    DELETE FROM notes WHERE user_id = :user_id AND id = :note_id
+    RETURNING id
+    """
+)
+
+
+def _engine_for_url(url: str) -> tuple[Engine, sessionmaker]:
+    """Engine + session factory per URL, shared by every NoteStorage in the process."""
+    with _ENGINES_LOCK:
+        cached = _ENGINES.get(url)
+        if cached is not None:
+            _ENGINES.move_to_end(url)
+            return cached
+        engine = create_engine_for_url(url)
+        factory = sessionmaker(
+            bind=engine,
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            future=True,
+        )
+        _ENGINES[url] = (engine, factory)
+        while len(_ENGINES) > _ENGINES_MAX_ENTRIES:
+            _, (evicted, _) = _ENGINES.popitem(last=False)
+            evicted.dispose()
+        return engine, factory
+
+
+def _get_for_user(session: Session, model: type[_ModelT], user_id: str, pk: str) -> _ModelT | None:
+    """
+    Primary-key lookup via session.get() with a post-check on ownership.
+
+    session.get() consults the identity map before emitting SQL, and its PK-only
+    SELECT is cached by SQLAlchemy. IDs are UUIDs, so the user_id check is what
+    enforces isolation, not the query.
+    """
+    obj = session.get(model, pk)
+    if obj is None or obj.user_id != user_id:
+        return None
+    return obj
+
+
+def _note_embedding_stmt(
+    user_id: str, note_id: str, embedding_model: str
+) -> StatementLambdaElement:
+    # lambda_stmt caches the constructed SELECT by the lambda's code location, so only
+    # the bound values are re-extracted per call.
+    return lambda_stmt(
+        lambda: select(NoteEmbeddingORM).where(
+            NoteEmbeddingORM.user_id == user_id,
+            NoteEmbeddingORM.note_id == note_id,
+            NoteEmbeddingORM.embedding_model == embedding_model,
+        )
+    )
+
+
+def _sqlite_vec_available(engine: Engine) -> bool:
+    """Return True if the optional sqlite-vec extension was loaded on connect."""
+    try:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT vec_version()")
+        return True
+    except OperationalError:
+        return False
+
+
 class NoteStorage:
     """
     SQLAlchemy-based storage facade used by Flask routes and services.
@@ -460,9 +1109,43 @@ class NoteStorage:
         self.engine, self.session_factory = self._configure_engine(db_path, database_url)
         self.dialect = self.engine.dialect.name
         self.sqlite_fts_table = "notes_fts"
+        self._embedding_matrices: _LRUCache[tuple[str, str], _EmbeddingMatrix] = _LRUCache()
+        self._folder_trees: _LRUCache[str, tuple[tuple[Any, ...], FolderNode]] = _LRUCache()
+        self._retrieval_cache: OrderedDict[tuple[Any, ...], _RetrievalCacheBucket] = OrderedDict()
+        self._retrieval_cache_lock = threading.Lock()
+        self._sqlite_vec = False
 
         if self.dialect == "sqlite":
             self.sqlite_fts_table = _ensure_sqlite_schema(self.engine)
+            self._sqlite_vec = _sqlite_vec_available(self.engine)
+
+    @contextmanager
+    def bulk_ingest(self) -> Generator[None, None, None]:
+        """
+        Suspend per-row FTS maintenance for the duration of a large import.
+
+        On SQLite the notes_ai/au/ad triggers are dropped on enter, and on exit the
+        FTS index is rebuilt from the notes table in one pass before the triggers are
+        recreated. The rebuild also runs if the block raises, so rows committed before
+        the failure are still searchable. On PostgreSQL this is a no-op.
+
+        Usage:
+            with storage.bulk_ingest():
+                storage.save_notes_bulk(user_id, items)
+        """
+        if self.dialect != "sqlite":
+            yield
+            return
+
+        with self.engine.begin() as conn:
+            _drop_fts_triggers(conn)
+        try:
+            yield
+        finally:
+            fts_table = self.sqlite_fts_table
+            with self.engine.begin() as conn:
+                conn.exec_driver_sql(f"INSERT INTO {fts_table}({fts_table}) VALUES('rebuild')")
+                _create_or_update_triggers(conn, fts_table)
 
     def save_note(self, user_id: str, content: str, metadata: NoteMetadata) -> str:
         """
@@ -476,27 +1159,55 @@ class NoteStorage:
         Returns:
             The ID of the newly created note.
         """
-        note_id = str(uuid4())
-        now = datetime.utcnow()
-        db_note = NoteORM(
-            id=note_id,
-            user_id=user_id,
-            title=metadata.title,
-            content=content,
-            folder_path=metadata.folder_path,
-            tags=_serialize_tags(metadata.tags),
-            created_at=now,
-            updated_at=now,
-            word_count=len(content.split()),
-            confidence=metadata.confidence,
-            transcription_duration=metadata.transcription_duration,
-            model_version=metadata.model_version,
-        )
+        return self.save_notes_bulk(user_id, [(content, metadata)])[0]
+
+    def save_notes_bulk(
+        self, user_id: str, items: list[tuple[str, NoteMetadata]]
+    ) -> list[str]:
+        """
+        Create many notes in one transaction (single executemany INSERT + one COMMIT).
+
+        Args:
+            user_id: The user ID who owns the notes.
+            items: (content, metadata) pairs, one per note.
+
+        Returns:
+            The IDs of the newly created notes, in input order.
+        """
+        if not items:
+            return []
+
+        now = _utcnow()
+        rows = [
+            {
+                "id": str(uuid4()),
+                "user_id": user_id,
+                "title": metadata.title,
+                "content": content,
+                "folder_path": metadata.folder_path,
+                "tags": _serialize_tags(metadata.tags),
+                "created_at": now,
+                "updated_at": now,
+                "word_count": len(content.split()),
+                "confidence": metadata.confidence,
+                "transcription_duration": metadata.transcription_duration,
+                "model_version": metadata.model_version,
+            }
+            for content, metadata in items
+        ]
+
+        tag_rows = [
+            tag_row
+            for row, (_, metadata) in zip(rows, items, strict=True)
+            for tag_row in _note_tag_rows(user_id, row["id"], metadata.tags)
+        ]
 
         with self._session_scope() as session:
-            session.add(db_note)
+            session.execute(insert(NoteORM), rows)
+            if tag_rows:
+                session.execute(insert(NoteTagORM), tag_rows)
 
-        return note_id
+        return [row["id"] for row in rows]
 
     def create_audio_clip_pending(
         self,
@@ -510,35 +1221,55 @@ class NoteStorage:
         storage_key: str,
         bucket: str | None = None,
     ) -> AudioClipDTO:
-        clip_id = clip_id or str(uuid4())
-        now = datetime.utcnow()
+        return self.create_audio_clips_pending_bulk(
+            user_id,
+            [
+                {
+                    "clip_id": clip_id,
+                    "note_id": note_id,
+                    "mime_type": mime_type,
+                    "bytes": bytes,
+                    "duration_ms": duration_ms,
+                    "storage_key": storage_key,
+                    "bucket": bucket,
+                }
+            ],
+        )[0]
+
+    def create_audio_clips_pending_bulk(
+        self, user_id: str, clips: list[Mapping[str, Any]]
+    ) -> list[AudioClipDTO]:
+        """
+        Create many pending audio clips in one transaction.
+
+        Each mapping takes the keyword arguments of `create_audio_clip_pending`
+        (`mime_type`, `bytes`, `storage_key` required; `clip_id`, `note_id`,
+        `duration_ms`, `bucket` optional).
+        """
+        if not clips:
+            return []
+
+        now = _utcnow()
+        rows = [
+            {
+                "id": clip.get("clip_id") or str(uuid4()),
+                "user_id": user_id,
+                "note_id": clip.get("note_id"),
+                "bucket": clip.get("bucket"),
+                "storage_key": clip["storage_key"],
+                "mime_type": clip["mime_type"],
+                "bytes": int(clip["bytes"]),
+                "duration_ms": clip.get("duration_ms"),
+                "status": "pending",
+                "created_at": now,
+            }
+            for clip in clips
+        ]
 
-        clip = AudioClipORM(
-            id=clip_id,
-            user_id=user_id,
-            note_id=note_id,
-            bucket=bucket,
-            storage_key=storage_key,
-            mime_type=mime_type,
-            bytes=int(bytes),
-            duration_ms=duration_ms,
-            status="pending",
-            created_at=now,
-        )
         with self._session_scope() as session:
-            session.add(clip)
-        return AudioClipDTO(
-            id=clip_id,
-            user_id=user_id,
-            note_id=note_id,
-            bucket=bucket,
-            storage_key=storage_key,
-            mime_type=mime_type,
-            bytes=int(bytes),
-            duration_ms=duration_ms,
-            status="pending",
-            created_at=now,
-        )
+            session.execute(insert(AudioClipORM), rows)
+
+        return [AudioClipDTO(**row) for row in rows]
 
     def mark_audio_clip_ready(
         self,
@@ -550,96 +1281,107 @@ class NoteStorage:
         note_id: str | None = None,
         duration_ms: int | None = None,
     ) -> AudioClipDTO | None:
-        with self._session_scope() as session:
-            clip = (
-                session.query(AudioClipORM)
-                .filter(AudioClipORM.user_id == user_id, AudioClipORM.id == clip_id)
-                .one_or_none()
-            )
-            if not clip:
-                return None
-            if bucket is not None:
-                clip.bucket = bucket
-            if storage_key is not None:
-                clip.storage_key = storage_key
-            if note_id is not None:
-                clip.note_id = note_id
-            if duration_ms is not None:
-                clip.duration_ms = duration_ms
-            clip.status = "ready"
-            session.add(clip)
-            return _audio_clip_to_dto(clip)
+        values: dict[str, Any] = {"status": "ready"}
+        if bucket is not None:
+            values["bucket"] = bucket
+        if storage_key is not None:
+            values["storage_key"] = storage_key
+        if note_id is not None:
+            values["note_id"] = note_id
+        if duration_ms is not None:
+            values["duration_ms"] = duration_ms
+        return self._update_audio_clip_returning(user_id, clip_id, values)
 
     def mark_audio_clip_failed(self, user_id: str, clip_id: str) -> AudioClipDTO | None:
+        return self._update_audio_clip_returning(user_id, clip_id, {"status": "failed"})
+
+    def _update_audio_clip_returning(
+        self, user_id: str, clip_id: str, values: dict[str, Any]
+    ) -> AudioClipDTO | None:
+        """Apply `values` with a single UPDATE ... RETURNING and return the updated clip."""
+        stmt = (
+            update(AudioClipORM)
+            .where(AudioClipORM.user_id == user_id, AudioClipORM.id == clip_id)
+            .values(**values)
+            .returning(*AudioClipORM.__table__.c)
+        )
         with self._session_scope() as session:
-            clip = (
-                session.query(AudioClipORM)
-                .filter(AudioClipORM.user_id == user_id, AudioClipORM.id == clip_id)
-                .one_or_none()
-            )
-            if not clip:
-                return None
-            clip.status = "failed"
-            session.add(clip)
-            return _audio_clip_to_dto(clip)
+            row = session.execute(
+                stmt, execution_options={"synchronize_session": False}
+            ).first()
+            return _audio_clip_to_dto(row) if row else None
 
     def get_audio_clip(self, user_id: str, clip_id: str) -> AudioClipDTO | None:
-        with self._session_scope() as session:
-            clip = (
-                session.query(AudioClipORM)
-                .filter(AudioClipORM.user_id == user_id, AudioClipORM.id == clip_id)
-                .one_or_none()
-            )
+        with self._session_scope(write=False) as session:
+            clip = _get_for_user(session, AudioClipORM, user_id, clip_id)
             return _audio_clip_to_dto(clip) if clip else None
 
     def get_primary_audio_clip_for_note(
         self, user_id: str, note_id: str
     ) -> AudioClipDTO | None:
-        with self._session_scope() as session:
-            clip = (
-                session.query(AudioClipORM)
-                .filter(
-                    AudioClipORM.user_id == user_id,
-                    AudioClipORM.note_id == note_id,
-                    AudioClipORM.status == "ready",
+        with self._session_scope(write=False) as session:
+            clip = session.execute(
+                lambda_stmt(
+                    lambda: select(AudioClipORM.__table__)
+                    .where(
+                        AudioClipORM.user_id == user_id,
+                        AudioClipORM.note_id == note_id,
+                        AudioClipORM.status == "ready",
+                    )
+                    .order_by(desc(AudioClipORM.created_at))
+                    .limit(1)
                 )
-                .order_by(desc(AudioClipORM.created_at))
-                .limit(1)
-                .one_or_none()
-            )
+            ).first()
             return _audio_clip_to_dto(clip) if clip else None
 
     def list_audio_clips_for_note(self, user_id: str, note_id: str) -> list[AudioClipDTO]:
         if not note_id:
             return []
-        with self._session_scope() as session:
-            rows = (
-                session.query(AudioClipORM)
-                .filter(AudioClipORM.user_id == user_id, AudioClipORM.note_id == note_id)
-                .order_by(desc(AudioClipORM.created_at))
-                .all()
-            )
+        with self._session_scope(write=False) as session:
+            rows = session.execute(
+                lambda_stmt(
+                    lambda: select(AudioClipORM.__table__)
+                    .where(AudioClipORM.user_id == user_id, AudioClipORM.note_id == note_id)
+                    .order_by(desc(AudioClipORM.created_at))
+                )
+            ).all()
             return [_audio_clip_to_dto(r) for r in rows]
 
     def delete_audio_clips_for_note(self, user_id: str, note_id: str) -> int:
         if not note_id:
             return 0
-        with self._session_scope() as session:
-            result = (
-                session.query(AudioClipORM)
-                .filter(AudioClipORM.user_id == user_id, AudioClipORM.note_id == note_id)
-                .delete(synchronize_session=False)
-            )
-            return int(result or 0)
+        return len(self.delete_audio_clips_returning(user_id, note_id=note_id))
 
     def delete_audio_clip(self, user_id: str, clip_id: str) -> bool:
+        return bool(self.delete_audio_clips_returning(user_id, clip_ids=[clip_id]))
+
+    def delete_audio_clips_returning(
+        self,
+        user_id: str,
+        *,
+        clip_ids: list[str] | None = None,
+        note_id: str | None = None,
+    ) -> list[Mapping[str, Any]]:
+        """
+        Delete clips by id and/or note and return what was removed.
+
+        Uses DELETE ... RETURNING (SQLite 3.35+, PostgreSQL) so callers that still need
+        storage keys for object cleanup get them without a separate SELECT.
+
+        Returns:
+            One {"id", "storage_key", "bucket"} mapping per deleted row.
+        """
+        if not clip_ids and not note_id:
+            return []
+        stmt = delete(AudioClipORM).where(AudioClipORM.user_id == user_id)
+        if clip_ids:
+            stmt = stmt.where(AudioClipORM.id.in_(clip_ids))
+        if note_id:
+            stmt = stmt.where(AudioClipORM.note_id == note_id)
+        stmt = stmt.returning(AudioClipORM.id, AudioClipORM.storage_key, AudioClipORM.bucket)
         with self._session_scope() as session:
-            result = (
-                session.query(AudioClipORM)
-                .filter(AudioClipORM.user_id == user_id, AudioClipORM.id == clip_id)
-                .delete(synchronize_session=False)
-            )
-            return result > 0
+            rows = session.execute(stmt, execution_options={"synchronize_session": False})
+            return [dict(row) for row in rows.mappings()]
 
     def list_stale_pending_audio_clips(
         self,
@@ -647,39 +1389,36 @@ class NoteStorage:
         *,
         older_than_minutes: int = 60,
         limit: int = 100,
+        after: tuple[datetime, str] | None = None,
     ) -> list[AudioClipDTO]:
         """
         Return stale pending clips for a user (used by opportunistic cleanup).
+
+        Results are ordered by (created_at, id). To page without re-reading rows that
+        were kept, pass the (created_at, id) of the last clip as `after`; clips
+        created in one bulk call share a created_at, hence the id tie-breaker.
         """
         older_than_minutes = max(1, int(older_than_minutes))
         limit = max(1, min(int(limit), 1000))
-        cutoff = datetime.utcnow().timestamp() - (older_than_minutes * 60)
-        cutoff_dt = datetime.utcfromtimestamp(cutoff)
+        cutoff_dt = _utcnow() - timedelta(minutes=older_than_minutes)
 
-        with self._session_scope() as session:
-            rows = (
-                session.query(AudioClipORM)
-                .filter(
-                    AudioClipORM.user_id == user_id,
-                    AudioClipORM.status == "pending",
-                    AudioClipORM.created_at < cutoff_dt,
-                )
-                .order_by(AudioClipORM.created_at.asc())
-                .limit(limit)
-                .all()
-            )
+        stmt = select(AudioClipORM.__table__).where(
+            AudioClipORM.user_id == user_id,
+            AudioClipORM.status == "pending",
+            AudioClipORM.created_at < cutoff_dt,
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(AudioClipORM.created_at, AudioClipORM.id) > tuple_(*after))
+        with self._session_scope(write=False) as session:
+            rows = session.execute(
+                stmt.order_by(AudioClipORM.created_at.asc(), AudioClipORM.id.asc()).limit(limit)
+            ).all()
             return [_audio_clip_to_dto(r) for r in rows]
 
     def delete_audio_clips(self, user_id: str, clip_ids: list[str]) -> int:
         if not clip_ids:
             return 0
-        with self._session_scope() as session:
-            result = (
-                session.query(AudioClipORM)
-                .filter(AudioClipORM.user_id == user_id, AudioClipORM.id.in_(clip_ids))
-                .delete(synchronize_session=False)
-            )
-            return int(result or 0)
+        return len(self.delete_audio_clips_returning(user_id, clip_ids=clip_ids))
 
     def upsert_note_embedding(
         self,
@@ -697,49 +1436,77 @@ class NoteStorage:
               - SQLite: JSON string
               - Postgres: pgvector literal string like "[0.1,0.2,...]"
         """
-        now = datetime.utcnow()
+        self.upsert_note_embeddings_bulk(
+            user_id,
+            embedding_model,
+            [
+                {
+                    "note_id": note_id,
+                    "content_hash": content_hash,
+                    "embedding_value": embedding_value,
+                }
+            ],
+        )
+
+    def upsert_note_embeddings_bulk(
+        self,
+        user_id: str,
+        embedding_model: str,
+        embeddings: list[Mapping[str, str]],
+    ) -> None:
+        """
+        Upsert many note embeddings for one user and model in a single transaction.
+
+        Each mapping takes `note_id`, `content_hash` and `embedding_value` (formatted
+        as for `upsert_note_embedding`). Rows go out as one executemany of
+        INSERT ... ON CONFLICT (user_id, note_id, embedding_model) DO UPDATE.
+        """
+        if not embeddings:
+            return
+        now = _utcnow()
+        stale = self._embedding_matrices.get((user_id, embedding_model))
+        if stale is not None:
+            # Keep the rows for the incremental rebuild; only force the reload.
+            self._embedding_matrices.put((user_id, embedding_model), replace(stale, watermark=None))
+
+        rows = [
+            {
+                "id": str(uuid4()),
+                "user_id": user_id,
+                "note_id": e["note_id"],
+                "embedding_model": embedding_model,
+                "content_hash": e["content_hash"],
+                "embedding": e["embedding_value"],
+                "embedding_blob": (
+                    self._parse_embedding(e["embedding_value"]).astype("<f4").tobytes()
+                    if self.dialect == "sqlite"
+                    else None
+                ),
+                "created_at": now,
+                "updated_at": now,
+            }
+            for e in embeddings
+        ]
+        insert_stmt = self._insert_for_upsert(NoteEmbeddingORM)
+        stmt = insert_stmt.on_conflict_do_update(
+            index_elements=["user_id", "note_id", "embedding_model"],
+            set_={
+                "content_hash": insert_stmt.excluded.content_hash,
+                "embedding": insert_stmt.excluded.embedding,
+                "embedding_blob": insert_stmt.excluded.embedding_blob,
+                "updated_at": insert_stmt.excluded.updated_at,
+            },
+        )
         with self._session_scope() as session:
-            existing = (
-                session.query(NoteEmbeddingORM)
-                .filter(
-                    NoteEmbeddingORM.user_id == user_id,
-                    NoteEmbeddingORM.note_id == note_id,
-                    NoteEmbeddingORM.embedding_model == embedding_model,
-                )
-                .one_or_none()
-            )
-            if existing:
-                existing.content_hash = content_hash
-                existing.embedding = embedding_value
-                existing.updated_at = now
-                session.add(existing)
-                return
-
-            db_emb = NoteEmbeddingORM(
-                id=str(uuid4()),
-                user_id=user_id,
-                note_id=note_id,
-                embedding_model=embedding_model,
-                content_hash=content_hash,
-                embedding=embedding_value,
-                created_at=now,
-                updated_at=now,
-            )
-            session.add(db_emb)
+            session.execute(stmt, rows)
 
     def get_note_embedding(
         self, user_id: str, note_id: str, embedding_model: str
     ) -> Mapping[str, Any] | None:
-        with self._session_scope() as session:
-            row = (
-                session.query(NoteEmbeddingORM)
-                .filter(
-                    NoteEmbeddingORM.user_id == user_id,
-                    NoteEmbeddingORM.note_id == note_id,
-                    NoteEmbeddingORM.embedding_model == embedding_model,
-                )
-                .one_or_none()
-            )
+        with self._session_scope(write=False) as session:
+            row = session.execute(
+                _note_embedding_stmt(user_id, note_id, embedding_model)
+            ).scalar_one_or_none()
             if not row:
                 return None
             return {
@@ -749,30 +1516,35 @@ class NoteStorage:
                 "embedding": row.embedding,
             }
 
-    def _parse_embedding(self, value: Any) -> list[float]:
+    def _parse_embedding(self, value: Any) -> np.ndarray:
+        """
+        Parse a stored or query embedding into a new float32 vector.
+
+        Accepts lists/arrays, JSON text (SQLite) and pgvector text ("[...]", optionally
+        with a "::vector" cast suffix; this is also valid JSON once the suffix is cut).
+        Returns an empty array for anything unparseable.
+        """
         if value is None:
-            return []
-        if isinstance(value, list):
-            return [float(x) for x in value]
+            return np.empty(0, dtype=np.float32)
         if isinstance(value, (bytes, bytearray)):
             value = value.decode()
         if isinstance(value, str):
             s = value.strip()
-            # SQLite JSON
-            if s.startswith("[") and (s.endswith("]") or s.endswith("]::vector")):
-                # Postgres pgvector text output looks like "[...]" as well; try JSON first.
-                parsed = vector_from_json(s)
-                if parsed:
-                    return parsed
-                inner = s.strip("[]")
-                if not inner:
-                    return []
-                try:
-                    return [float(x) for x in inner.split(",")]
-                except Exception:
-                    return []
-            return vector_from_json(s)
-        return []
+            if s.endswith("::vector"):
+                s = s[: -len("::vector")].rstrip()
+            if not s.startswith("["):
+                return np.empty(0, dtype=np.float32)
+            try:
+                value = _json_loads(s)
+            except ValueError:
+                return np.empty(0, dtype=np.float32)
+        if not isinstance(value, (list, tuple, np.ndarray)):
+            return np.empty(0, dtype=np.float32)
+        try:
+            vec = np.array(value, dtype=np.float32)
+        except (TypeError, ValueError):
+            return np.empty(0, dtype=np.float32)
+        return vec if vec.ndim == 1 else np.empty(0, dtype=np.float32)
 
     def semantic_search(
         self,
@@ -781,6 +1553,9 @@ class NoteStorage:
         limit: int = 50,
         candidate_note_ids: list[str] | None = None,
         embedding_model: str = "text-embedding-3-small",
+        *,
+        query_embedding: np.ndarray | None = None,
+        candidate_filter: Select[tuple[str]] | None = None,
     ) -> list[Mapping[str, Any]]:
         """
         Semantic search over embeddings table.
@@ -789,36 +1564,36 @@ class NoteStorage:
             query_embedding_literal:
               - SQLite: JSON string of floats
               - Postgres: pgvector literal string like "[0.1,0.2,...]"
+            query_embedding: the literal already parsed with _parse_embedding(); the
+              SQLite paths use it instead of parsing the literal again.
+            candidate_filter: a SELECT of allowed note IDs (see
+              _candidate_notes_select()). Postgres joins it in the same query; SQLite
+              materializes it into candidate_note_ids.
         """
         limit = max(1, limit)
         if self.dialect == "postgresql":
-            where_extra = ""
+            if candidate_filter is not None:
+                stmt = _pg_semantic_search_in_select(
+                    candidate_filter, user_id, embedding_model, query_embedding_literal, limit
+                )
+                with self._session_scope(write=False) as session:
+                    rows = session.execute(stmt).mappings().all()
+                return [
+                    {"note_id": r["note_id"], "score": float(r["score"] or 0.0)} for r in rows
+                ]
+
             params: dict[str, Any] = {
                 "user_id": user_id,
                 "embedding_model": embedding_model,
                 "qvec": query_embedding_literal,
                 "limit": limit,
             }
+            sql = _PG_SEMANTIC_SEARCH_SQL
             if candidate_note_ids:
-                where_extra = " AND note_id IN :note_ids"
+                sql = _PG_SEMANTIC_SEARCH_IN_NOTES_SQL
                 params["note_ids"] = candidate_note_ids
 
-            sql = text(
-                f"""
-                SELECT note_id,
-                       (1.0 / (1.0 + (embedding <=> ((:qvec)::vector)))) AS score
-                FROM note_embeddings
-                WHERE user_id = :user_id
-                  AND embedding_model = :embedding_model
-                  {where_extra}
-                ORDER BY embedding <=> ((:qvec)::vector)
-                LIMIT :limit
-                """
-            )
-            if candidate_note_ids:
-                sql = sql.bindparams(bindparam("note_ids", expanding=True))
-
-            with self._session_scope() as session:
+            with self._session_scope(write=False) as session:
                 rows = (
                     session.execute(sql, params)
                     .mappings()
@@ -826,44 +1601,209 @@ class NoteStorage:
                 )
             return [{"note_id": r["note_id"], "score": float(r["score"] or 0.0)} for r in rows]
 
-        # SQLite fallback: load candidate embeddings and score in Python
-        with self._session_scope() as session:
-            query = (
-                session.query(NoteEmbeddingORM)
-                .filter(
-                    NoteEmbeddingORM.user_id == user_id,
-                    NoteEmbeddingORM.embedding_model == embedding_model,
-                )
+        if candidate_filter is not None and candidate_note_ids is None:
+            candidate_note_ids = self._materialize_candidates(candidate_filter)
+            if not candidate_note_ids:
+                return []
+
+        q_vec = (
+            query_embedding
+            if query_embedding is not None
+            else self._parse_embedding(query_embedding_literal)
+        )
+        if not q_vec.size:
+            return []
+
+        if self._sqlite_vec:
+            hits = self._semantic_search_sqlite_vec(
+                user_id, q_vec, limit, candidate_note_ids, embedding_model
             )
-            if candidate_note_ids:
-                query = query.filter(NoteEmbeddingORM.note_id.in_(candidate_note_ids))
-            rows = query.all()
+            if hits is not None:
+                return hits
 
-        q_vec = self._parse_embedding(query_embedding_literal)
-        if not q_vec:
+        # SQLite fallback: score against a cached, row-normalized matrix in NumPy.
+        with self._session_scope(write=False) as session:
+            embeddings = self._load_embedding_matrix(session, user_id, embedding_model)
+
+        if not embeddings.note_ids or embeddings.matrix.shape[1] != q_vec.shape[0]:
             return []
 
-        from .embeddings import cosine_similarity, normalize_similarity
+        q_norm = float(np.linalg.norm(q_vec))
+        if q_norm > 0.0:
+            q_vec = q_vec / q_norm
+
+        note_ids = embeddings.note_ids
+        matrix = embeddings.matrix
+        if candidate_note_ids:
+            rows = [
+                embeddings.row_by_note_id[nid]
+                for nid in dict.fromkeys(candidate_note_ids)
+                if nid in embeddings.row_by_note_id
+            ]
+            if not rows:
+                return []
+            note_ids = [note_ids[i] for i in rows]
+            matrix = matrix[rows]
+
+        # Cosine similarity in [-1, 1] -> [0, 1], same mapping as normalize_similarity().
+        scores = np.clip((matrix @ q_vec + 1.0) / 2.0, 0.0, 1.0)
+        if limit < scores.shape[0]:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(scores.shape[0])
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [{"note_id": note_ids[i], "score": float(scores[i])} for i in top]
+
+    def _semantic_search_sqlite_vec(
+        self,
+        user_id: str,
+        q_vec: np.ndarray,
+        limit: int,
+        candidate_note_ids: list[str] | None,
+        embedding_model: str,
+    ) -> list[Mapping[str, Any]] | None:
+        """
+        Rank embeddings inside SQLite with sqlite-vec's vec_distance_cosine().
+
+        Reads the packed float32 embedding_blob, falling back to the JSON text for
+        older rows without one. Returns None if the query fails (e.g. a zero vector),
+        letting the caller fall back to the NumPy path.
+        """
+        params: dict[str, Any] = {
+            "user_id": user_id,
+            "embedding_model": embedding_model,
+            "qvec": q_vec.tobytes(),
+            "dims": int(q_vec.shape[0]),
+            "limit": limit,
+        }
+        sql = _SQLITE_VEC_SEARCH_SQL
+        if candidate_note_ids:
+            sql = _SQLITE_VEC_SEARCH_IN_NOTES_SQL
+            params["note_ids"] = candidate_note_ids
 
-        scored = []
-        for row in rows:
-            vec = self._parse_embedding(row.embedding)
-            sim = normalize_similarity(cosine_similarity(q_vec, vec))
-            scored.append({"note_id": row.note_id, "score": float(sim)})
+        try:
+            with self._session_scope(write=False) as session:
+                rows = session.execute(sql, params).mappings().all()
+        except OperationalError:
+            return None
+        return [
+            {"note_id": r["note_id"], "score": min(1.0, max(0.0, float(r["score"] or 0.0)))}
+            for r in rows
+        ]
 
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:limit]
+    def _load_embedding_matrix(
+        self, session: Session, user_id: str, embedding_model: str
+    ) -> _EmbeddingMatrix:
+        """
+        Return the cached embedding matrix for (user_id, embedding_model), rebuilding it
+        when the table watermark shows the underlying rows have changed.
+        """
+        base_filter = (
+            NoteEmbeddingORM.user_id == user_id,
+            NoteEmbeddingORM.embedding_model == embedding_model,
+        )
+        count, max_updated_at = (
+            session.query(func.count(NoteEmbeddingORM.id), func.max(NoteEmbeddingORM.updated_at))
+            .filter(*base_filter)
+            .one()
+        )
+        watermark = (int(count or 0), max_updated_at)
+
+        cache_key = (user_id, embedding_model)
+        cached = self._embedding_matrices.get(cache_key)
+        if cached is not None and cached.watermark == watermark:
+            return cached
+
+        # Rebuild incrementally: list (note_id, content_hash) and only read vectors for
+        # rows that are new or re-embedded; unchanged rows are copied from the old
+        # (already normalized) matrix. The first build reads everything in one pass.
+        if cached is not None and cached.note_ids:
+            keyed = session.execute(
+                select(NoteEmbeddingORM.note_id, NoteEmbeddingORM.content_hash).where(
+                    *base_filter
+                )
+            ).all()
+            reusable = {
+                nid: cached.row_by_note_id[nid]
+                for nid, content_hash in keyed
+                if nid in cached.row_by_note_id
+                and cached.content_hashes[cached.row_by_note_id[nid]] == content_hash
+            }
+            changed_ids = [nid for nid, _ in keyed if nid not in reusable]
+        else:
+            keyed, reusable, changed_ids = None, {}, None
+
+        fresh: dict[str, tuple[str, np.ndarray]] = {}
+        if changed_ids is None or changed_ids:
+            stmt = select(
+                NoteEmbeddingORM.note_id,
+                NoteEmbeddingORM.content_hash,
+                NoteEmbeddingORM.embedding_blob,
+                NoteEmbeddingORM.embedding,
+            ).where(*base_filter)
+            if changed_ids is not None:
+                stmt = stmt.where(NoteEmbeddingORM.note_id.in_(changed_ids))
+            for note_id, content_hash, blob, value in session.execute(stmt):
+                # Rows written before embedding_blob existed fall back to the JSON column.
+                vec = np.frombuffer(blob, dtype="<f4") if blob else self._parse_embedding(value)
+                if vec.size:
+                    norm = float(np.linalg.norm(vec))
+                    fresh[note_id] = (content_hash, vec / norm if norm else vec)
+        if keyed is None:
+            keyed = [(nid, content_hash) for nid, (content_hash, _) in fresh.items()]
+
+        note_ids: list[str] = []
+        content_hashes: list[str] = []
+        vectors: list[np.ndarray] = []
+        dims: int | None = None
+        for note_id, content_hash in keyed:
+            if note_id in reusable:
+                vec = cached.matrix[reusable[note_id]]
+            elif note_id in fresh:
+                content_hash, vec = fresh[note_id]
+            else:
+                continue
+            if dims is None:
+                dims = len(vec)
+            if len(vec) != dims:
+                # Mixed dimensions cannot share a matrix; cosine against them was always 0.
+                continue
+            note_ids.append(note_id)
+            content_hashes.append(content_hash)
+            vectors.append(vec)
+
+        if vectors:
+            matrix = np.stack(vectors).astype(np.float32, copy=False)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+
+        built = _EmbeddingMatrix(
+            watermark=watermark,
+            note_ids=note_ids,
+            row_by_note_id={nid: i for i, nid in enumerate(note_ids)},
+            matrix=matrix,
+            content_hashes=content_hashes,
+        )
+        self._embedding_matrices.put(cache_key, built)
+        return built
 
-    def get_notes_by_ids(self, user_id: str, note_ids: list[str]) -> list[NoteDTO]:
+    def get_notes_by_ids(
+        self, user_id: str, note_ids: list[str], *, content_chars: int | None = None
+    ) -> list[NoteDTO]:
+        """
+        Notes in `note_ids` order. With `content_chars`, content is truncated in SQL so
+        long transcripts are not transferred just to be cut in Python.
+        """
         if not note_ids:
             return []
-        with self._session_scope() as session:
-            notes = (
-                session.query(NoteORM)
-                .filter(NoteORM.user_id == user_id, NoteORM.id.in_(note_ids))
-                .all()
-            )
-            dto_by_id = {n.id: _note_to_dto(n) for n in notes}
+        # Read-only path: select plain columns so rows skip ORM identity/unit-of-work
+        # bookkeeping, and build DTOs straight from the row mappings.
+        stmt = select(*_note_dto_columns(content_chars)).where(
+            NoteORM.user_id == user_id, NoteORM.id.in_(list(dict.fromkeys(note_ids)))
+        )
+        with self._session_scope(write=False) as session:
+            rows = session.execute(stmt).mappings().all()
+        dto_by_id = {row["id"]: _mapping_to_note(row) for row in rows}
         return [dto_by_id[nid] for nid in note_ids if nid in dto_by_id]
 
     def _date_range_to_datetimes(self, start_date: str | None, end_date: str | None) -> tuple[datetime | None, datetime | None]:
@@ -884,7 +1824,7 @@ class NoteStorage:
 
         return (to_start(start_date) if start_date else None, to_end(end_date) if end_date else None)
 
-    def _filter_candidate_note_ids(
+    def _candidate_notes_select(
         self,
         user_id: str,
         folder_paths: list[str] | None = None,
@@ -892,12 +1832,13 @@ class NoteStorage:
         exclude_tags: list[str] | None = None,
         start_date: str | None = None,
         end_date: str | None = None,
-        max_candidates: int = 5000,
-    ) -> list[str] | None:
+    ) -> Select[tuple[str]] | None:
         """
-        Returns a list of candidate note IDs, or None if no filters were applied.
+        Returns a SELECT of the note IDs matching the metadata filters, or None if no
+        filters were applied.
 
-        This is used to constrain semantic search for performance.
+        Kept as a statement so Postgres can semi-join it inside semantic search instead
+        of receiving the IDs back as a long IN list.
         """
         folder_paths = [p for p in (folder_paths or []) if p]
         include_tags = [t for t in (include_tags or []) if t]
@@ -909,43 +1850,68 @@ class NoteStorage:
         if not any_filter:
             return None
 
-        with self._session_scope() as session:
-            query = session.query(NoteORM.id).filter(NoteORM.user_id == user_id)
-
-            # Time filter: use created_at for "in February" semantics.
-            if start_dt is not None:
-                query = query.filter(NoteORM.created_at >= start_dt)
-            if end_dt is not None:
-                query = query.filter(NoteORM.created_at <= end_dt)
-
-            if folder_paths:
-                folder_clauses = [self._folder_filter_clause(p) for p in folder_paths]
-                query = query.filter(or_(*folder_clauses))
-
-            if include_tags:
-                if self.dialect == "postgresql":
-                    include_any = [
-                        cast(NoteORM.tags, JSONB).op("@>")(json.dumps([tag]))
-                        for tag in include_tags
-                    ]
-                    query = query.filter(or_(*include_any))
-                else:
-                    include_any = [NoteORM.tags.like(f'%\"{tag}\"%') for tag in include_tags]
-                    query = query.filter(or_(*include_any))
-
-            if exclude_tags:
-                if self.dialect == "postgresql":
-                    exclude_any = [
-                        cast(NoteORM.tags, JSONB).op("@>")(json.dumps([tag]))
-                        for tag in exclude_tags
-                    ]
-                    query = query.filter(~or_(*exclude_any))
-                else:
-                    exclude_any = [NoteORM.tags.like(f'%\"{tag}\"%') for tag in exclude_tags]
-                    query = query.filter(~or_(*exclude_any))
-
-            rows = query.limit(max(1, max_candidates)).all()
-            return [note_id for (note_id,) in rows]
+        stmt = select(NoteORM.id).where(NoteORM.user_id == user_id)
+
+        # Time filter: use created_at for "in February" semantics.
+        if start_dt is not None:
+            stmt = stmt.where(NoteORM.created_at >= start_dt)
+        if end_dt is not None:
+            stmt = stmt.where(NoteORM.created_at <= end_dt)
+
+        if folder_paths:
+            stmt = stmt.where(self._folder_filter_clause(*folder_paths))
+
+        if include_tags:
+            stmt = stmt.where(
+                NoteORM.id.in_(
+                    select(NoteTagORM.note_id).where(
+                        NoteTagORM.user_id == user_id,
+                        NoteTagORM.tag.in_(include_tags),
+                    )
+                )
+            )
+
+        if exclude_tags:
+            stmt = stmt.where(
+                ~exists().where(
+                    NoteTagORM.note_id == NoteORM.id,
+                    NoteTagORM.tag.in_(exclude_tags),
+                )
+            )
+        return stmt
+
+    def _filter_candidate_note_ids(
+        self,
+        user_id: str,
+        folder_paths: list[str] | None = None,
+        include_tags: list[str] | None = None,
+        exclude_tags: list[str] | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        max_candidates: int = 5000,
+    ) -> list[str] | None:
+        """
+        Returns a list of candidate note IDs, or None if no filters were applied.
+
+        This is used to constrain semantic search for performance.
+        """
+        stmt = self._candidate_notes_select(
+            user_id,
+            folder_paths=folder_paths,
+            include_tags=include_tags,
+            exclude_tags=exclude_tags,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        if stmt is None:
+            return None
+        return self._materialize_candidates(stmt, max_candidates)
+
+    def _materialize_candidates(
+        self, candidates: Select[tuple[str]], max_candidates: int = 5000
+    ) -> list[str]:
+        with self._session_scope(write=False) as session:
+            return list(session.scalars(candidates.limit(max(1, max_candidates))))
 
     def retrieve_for_question(
         self,
@@ -962,63 +1928,187 @@ class NoteStorage:
         embedding_model: str = "text-embedding-3-small",
     ) -> list[Mapping[str, Any]]:
         """
-        Hybrid retrieval: metadata filters + FTS + semantic embeddings.
+        Hybrid retrieval: metadata filters + FTS + semantic embeddings, fused with
+        weighted Reciprocal Rank Fusion.
 
-        Returns ranked note payloads (note DTO + snippet + score).
+        Returns ranked note payloads (note DTO + snippet + score). A note's content may
+        be cut to its first _RETRIEVAL_CONTENT_CHARS characters.
         """
         limit = max(1, min(limit, 50))
-        candidate_ids = self._filter_candidate_note_ids(
-            user_id=user_id,
+
+        cache_key = (
+            user_id,
+            embedding_model,
+            limit,
+            # FTS feeds the fusion, so a different keyword query is a different key.
+            # Both FTS backends are case-insensitive, hence the normalization.
+            " ".join((fts_query or "").split()).lower(),
+            tuple(folder_paths or ()),
+            tuple(include_tags or ()),
+            tuple(exclude_tags or ()),
+            start_date,
+            end_date,
+        )
+        query_vec = self._parse_embedding(query_embedding_literal)
+        norm = float(np.linalg.norm(query_vec)) if query_vec.size else 0.0
+        watermark: tuple[Any, ...] | None = None
+        if norm > 0.0:
+            query_vec /= norm
+            with self._session_scope(write=False) as session:
+                watermark = self._retrieval_watermark(session, user_id, embedding_model)
+            cached = self._cached_retrieval(cache_key, watermark, query_vec)
+            if cached is not None:
+                return cached
+
+        # Low-signal gate: a zero (or unparseable) query embedding has no direction, so
+        # its cosine ranking is arbitrary, and a keyword query of only stopwords matches
+        # nothing useful; skip whichever list has no signal, and skip retrieval
+        # altogether when neither does.
+        keywords = re.findall(r"\w+", (fts_query or "").lower())
+        has_keywords = any(word not in _FTS_STOPWORDS for word in keywords)
+        if norm == 0.0 and not has_keywords:
+            return []
+
+        # Candidate generation
+        semantic_k = min(200, limit * 5) if norm > 0.0 else 0
+        fts_k = min(200, limit * 5) if has_keywords else 0
+        candidates = self._candidate_notes_select(
+            user_id,
             folder_paths=folder_paths,
             include_tags=include_tags,
             exclude_tags=exclude_tags,
             start_date=start_date,
             end_date=end_date,
         )
+        if self.dialect == "postgresql":
+            results = self._hybrid_retrieve_postgres(
+                user_id,
+                fts_query=fts_query,
+                query_embedding_literal=query_embedding_literal,
+                candidates=candidates,
+                semantic_k=semantic_k,
+                fts_k=fts_k,
+                limit=limit,
+                embedding_model=embedding_model,
+            )
+        else:
+            results = self._hybrid_retrieve_sqlite(
+                user_id,
+                fts_query=fts_query,
+                query_embedding_literal=query_embedding_literal,
+                query_vec=query_vec,
+                candidates=candidates,
+                semantic_k=semantic_k,
+                fts_k=fts_k,
+                limit=limit,
+                embedding_model=embedding_model,
+            )
+        if watermark is not None:
+            self._store_retrieval(cache_key, watermark, query_vec, results)
+        return results
 
-        # Candidate generation
-        semantic_k = min(200, limit * 5)
-        fts_k = min(200, limit * 5)
+    def _hybrid_retrieve_postgres(
+        self,
+        user_id: str,
+        *,
+        fts_query: str,
+        query_embedding_literal: str,
+        candidates: Select[tuple[str]] | None,
+        semantic_k: int,
+        fts_k: int,
+        limit: int,
+        embedding_model: str,
+    ) -> list[Mapping[str, Any]]:
+        """Rank, fuse and hydrate in a single statement (see _pg_hybrid_retrieve_select)."""
+        stmt = _pg_hybrid_retrieve_select(
+            user_id,
+            embedding_model,
+            query_embedding_literal,
+            fts_query or "",
+            candidates,
+            semantic_k,
+            fts_k,
+            limit,
+        )
+        with self._session_scope(write=False) as session:
+            rows = session.execute(stmt).mappings().all()
+        return [
+            {
+                "note": _mapping_to_note(row),
+                "snippet": row["fused_snippet"] or (row["content"] or "")[:220],
+                "score": float(row["fused_score"]),
+                "semantic_score": float(row["semantic_score"] or 0.0),
+                "fts_score": float(row["fts_score"] or 0.0),
+            }
+            for row in rows
+        ]
 
-        semantic_hits = self.semantic_search(
-            user_id=user_id,
-            query_embedding_literal=query_embedding_literal,
-            limit=semantic_k,
-            candidate_note_ids=candidate_ids,
-            embedding_model=embedding_model,
+    def _hybrid_retrieve_sqlite(
+        self,
+        user_id: str,
+        *,
+        fts_query: str,
+        query_embedding_literal: str,
+        query_vec: np.ndarray,
+        candidates: Select[tuple[str]] | None,
+        semantic_k: int,
+        fts_k: int,
+        limit: int,
+        embedding_model: str,
+    ) -> list[Mapping[str, Any]]:
+        """
+        Semantic ranking runs in NumPy (or sqlite-vec), so the two lists are fused here
+        rather than in SQL.
+        """
+        # Both lists are restricted to the same candidate IDs, so FTS ranks its top
+        # fts_k within the filtered notes instead of being trimmed afterwards.
+        candidate_ids = (
+            self._materialize_candidates(candidates) if candidates is not None else None
+        )
+        # Both run inline on the request thread: a process-wide pool would queue one
+        # request's FTS behind every other concurrent /ask.
+        fts_results = (
+            self.search_notes(user_id, fts_query, fts_k, candidate_note_ids=candidate_ids)
+            if fts_k
+            else []
+        )
+        semantic_hits = (
+            self.semantic_search(
+                user_id=user_id,
+                query_embedding_literal=query_embedding_literal,
+                limit=semantic_k,
+                candidate_note_ids=candidate_ids,
+                embedding_model=embedding_model,
+                query_embedding=query_vec,
+            )
+            if semantic_k and candidate_ids != []
+            else []
         )
-        fts_results = self.search_notes(user_id, fts_query, limit=fts_k)
-
-        # Normalize FTS scores into [0, 1]
-        fts_scores: dict[str, float] = {}
-        if fts_results:
-            if self.dialect == "sqlite":
-                # SQLite rank: lower is better, convert via 1/(1+rank)
-                for r in fts_results:
-                    fts_scores[r.note.id] = 1.0 / (1.0 + float(r.rank or 0.0))
-            else:
-                max_rank = max(float(r.rank or 0.0) for r in fts_results) or 1.0
-                for r in fts_results:
-                    fts_scores[r.note.id] = float(r.rank or 0.0) / max_rank
 
+        # Normalize FTS scores into [0, 1] (reported alongside the fused score).
+        # SQLite rank: lower is better, convert via 1/(1+rank).
+        fts_scores = {r.note.id: 1.0 / (1.0 + float(r.rank or 0.0)) for r in fts_results}
         semantic_scores: dict[str, float] = {
             h["note_id"]: float(h.get("score") or 0.0) for h in semantic_hits
         }
 
-        # Combine/dedupe
-        note_ids = set(semantic_scores.keys()) | set(fts_scores.keys())
-        if candidate_ids is not None:
-            note_ids &= set(candidate_ids)
-
-        # Weighted blend
-        def blended(nid: str) -> float:
-            s = semantic_scores.get(nid, 0.0)
-            f = fts_scores.get(nid, 0.0)
-            return 0.65 * s + 0.35 * f
-
-        ranked_ids = sorted(note_ids, key=blended, reverse=True)[:limit]
-        notes = self.get_notes_by_ids(user_id, ranked_ids)
-        note_by_id = {n.id: n for n in notes}
+        fused: dict[str, float] = {}
+        for rank, h in enumerate(semantic_hits, start=1):
+            fused[h["note_id"]] = _RRF_SEMANTIC_WEIGHT / (_RRF_K + rank)
+        for rank, r in enumerate(fts_results, start=1):
+            fused[r.note.id] = fused.get(r.note.id, 0.0) + _RRF_FTS_WEIGHT / (_RRF_K + rank)
+
+        ranked_ids = heapq.nlargest(limit, fused, key=fused.__getitem__)
+        # FTS hits already carry full notes; only semantic-only hits need a fetch.
+        note_by_id = {r.note.id: r.note for r in fts_results}
+        missing_ids = [nid for nid in ranked_ids if nid not in note_by_id]
+        if missing_ids:
+            note_by_id.update(
+                (n.id, n)
+                for n in self.get_notes_by_ids(
+                    user_id, missing_ids, content_chars=_RETRIEVAL_CONTENT_CHARS
+                )
+            )
 
         # Snippets: use FTS snippet when available, otherwise a small content preview.
         fts_snippets = {r.note.id: r.snippet for r in fts_results}
@@ -1035,20 +2125,103 @@ class NoteStorage:
                 {
                     "note": note,
                     "snippet": snippet,
-                    "score": blended(nid),
+                    "score": fused[nid],
                     "semantic_score": semantic_scores.get(nid, 0.0),
                     "fts_score": fts_scores.get(nid, 0.0),
                 }
             )
         return results
 
-    def get_note(self, user_id: str, note_id: str) -> NoteDTO | None:
-        with self._session_scope() as session:
-            note = (
-                session.query(NoteORM)
-                .filter(NoteORM.id == note_id, NoteORM.user_id == user_id)
-                .one_or_none()
+    def _retrieval_watermark(
+        self, session: Session, user_id: str, embedding_model: str
+    ) -> tuple[Any, ...]:
+        """(count, max updated_at) of the user's notes and embeddings, in one query."""
+        notes = (
+            select(func.count(NoteORM.id), func.max(NoteORM.updated_at))
+            .where(NoteORM.user_id == user_id)
+            .subquery()
+        )
+        embeddings = (
+            select(func.count(NoteEmbeddingORM.id), func.max(NoteEmbeddingORM.updated_at))
+            .where(
+                NoteEmbeddingORM.user_id == user_id,
+                NoteEmbeddingORM.embedding_model == embedding_model,
             )
+            .subquery()
+        )
+        stmt = select(notes, embeddings).select_from(notes.join(embeddings, true()))
+        return tuple(session.execute(stmt).one())
+
+    def _cached_retrieval(
+        self, key: tuple[Any, ...], watermark: tuple[Any, ...], query_vec: np.ndarray
+    ) -> list[Mapping[str, Any]] | None:
+        now = time.monotonic()
+        with self._retrieval_cache_lock:
+            bucket = self._retrieval_cache.get(key)
+            if bucket is None:
+                return None
+            if bucket.watermark != watermark:
+                del self._retrieval_cache[key]
+                return None
+            live = [i for i, expires_at in enumerate(bucket.expires_at) if expires_at > now]
+            if len(live) < len(bucket.expires_at):
+                bucket.vectors = bucket.vectors[live]
+                bucket.expires_at = [bucket.expires_at[i] for i in live]
+                bucket.results = [bucket.results[i] for i in live]
+            if not live or bucket.vectors.shape[1] != query_vec.shape[0]:
+                return None
+            similarities = bucket.vectors @ query_vec
+            best = int(np.argmax(similarities))
+            if similarities[best] < _RETRIEVAL_CACHE_SIMILARITY:
+                return None
+            self._retrieval_cache.move_to_end(key)
+            # Copy each payload so callers cannot mutate the cached entries.
+            return [dict(r) for r in bucket.results[best]]
+
+    def _store_retrieval(
+        self,
+        key: tuple[Any, ...],
+        watermark: tuple[Any, ...],
+        query_vec: np.ndarray,
+        results: list[Mapping[str, Any]],
+    ) -> None:
+        row = query_vec.astype(np.float16)[np.newaxis, :]
+        expires_at = time.monotonic() + _RETRIEVAL_CACHE_TTL_SECONDS
+        with self._retrieval_cache_lock:
+            bucket = self._retrieval_cache.get(key)
+            if (
+                bucket is None
+                or bucket.watermark != watermark
+                or bucket.vectors.shape[1] != row.shape[1]
+            ):
+                bucket = _RetrievalCacheBucket(
+                    watermark=watermark,
+                    vectors=row,
+                    expires_at=[expires_at],
+                    results=[[dict(r) for r in results]],
+                )
+            else:
+                bucket.vectors = np.vstack([bucket.vectors, row])
+                bucket.expires_at.append(expires_at)
+                bucket.results.append([dict(r) for r in results])
+            self._retrieval_cache[key] = bucket
+            self._retrieval_cache.move_to_end(key)
+
+            # LRU eviction: drop whole buckets, least recently used first, then trim
+            # the oldest entries if a single bucket is over the cap on its own.
+            total = sum(len(b.results) for b in self._retrieval_cache.values())
+            while total > _RETRIEVAL_CACHE_MAX_ENTRIES and len(self._retrieval_cache) > 1:
+                _, evicted = self._retrieval_cache.popitem(last=False)
+                total -= len(evicted.results)
+            overflow = total - _RETRIEVAL_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                bucket.vectors = bucket.vectors[overflow:]
+                bucket.expires_at = bucket.expires_at[overflow:]
+                bucket.results = bucket.results[overflow:]
+
+    def get_note(self, user_id: str, note_id: str) -> NoteDTO | None:
+        with self._session_scope(write=False) as session:
+            note = _get_for_user(session, NoteORM, user_id, note_id)
             return _note_to_dto(note) if note else None
 
     def update_note(
@@ -1059,42 +2232,90 @@ class NoteStorage:
         metadata: NoteMetadata | None = None,
     ) -> bool:
         with self._session_scope() as session:
-            note = (
-                session.query(NoteORM)
-                .filter(NoteORM.id == note_id, NoteORM.user_id == user_id)
-                .one_or_none()
-            )
+            note = _get_for_user(session, NoteORM, user_id, note_id)
+            return bool(note) and self._apply_note_update(session, note, content, metadata)
 
+    def update_note_returning(
+        self,
+        user_id: str,
+        note_id: str,
+        content: str | None = None,
+        metadata: NoteMetadata | None = None,
+    ) -> NoteDTO | None:
+        """
+        Like update_note(), but returns the note as stored afterwards (None if not found),
+        so callers do not need a second get_note() round-trip.
+        """
+        with self._session_scope() as session:
+            note = _get_for_user(session, NoteORM, user_id, note_id)
             if not note:
-                return False
+                return None
+            self._apply_note_update(session, note, content, metadata)
+            return _note_to_dto(note)
 
-            updated = False
-
-            if content is not None:
-                note.content = content
-                note.word_count = len(content.split())
-                updated = True
-
-            if metadata:
-                note.title = metadata.title or note.title
-                note.folder_path = metadata.folder_path or note.folder_path
-                note.tags = _serialize_tags(metadata.tags)
-                note.confidence = metadata.confidence if metadata.confidence is not None else note.confidence
-                note.transcription_duration = (
-                    metadata.transcription_duration
-                    if metadata.transcription_duration is not None
-                    else note.transcription_duration
+    def _apply_note_update(
+        self,
+        session: Session,
+        note: NoteORM,
+        content: str | None,
+        metadata: NoteMetadata | None,
+    ) -> bool:
+        user_id = note.user_id
+        updated = False
+
+        if content is not None:
+            note.content = content
+            note.word_count = len(content.split())
+            updated = True
+
+        if metadata:
+            # Diff against the note_tags rows themselves, not the tags JSON, so the
+            # table converges even if the two have drifted apart.
+            old_tags = set(
+                session.execute(
+                    select(NoteTagORM.tag).where(NoteTagORM.note_id == note.id)
+                ).scalars()
+            )
+            new_tags = {t for t in (metadata.tags or []) if t}
+            if old_tags - new_tags:
+                session.execute(
+                    delete(NoteTagORM).where(
+                        NoteTagORM.note_id == note.id,
+                        NoteTagORM.tag.in_(old_tags - new_tags),
+                    )
                 )
-                note.model_version = metadata.model_version or note.model_version
-                updated = True
+            if new_tags - old_tags:
+                session.execute(
+                    insert(NoteTagORM),
+                    _note_tag_rows(user_id, note.id, sorted(new_tags - old_tags)),
+                )
+
+            note.title = metadata.title or note.title
+            note.folder_path = metadata.folder_path or note.folder_path
+            note.tags = _serialize_tags(metadata.tags)
+            note.confidence = metadata.confidence if metadata.confidence is not None else note.confidence
+            note.transcription_duration = (
+                metadata.transcription_duration
+                if metadata.transcription_duration is not None
+                else note.transcription_duration
+            )
+            note.model_version = metadata.model_version or note.model_version
+            updated = True
 
-            if updated:
-                note.updated_at = datetime.utcnow()
-                session.add(note)
+        if updated:
+            note.updated_at = _utcnow()
 
-            return updated
+        return updated
 
     def delete_note(self, user_id: str, note_id: str) -> bool:
+        if self.dialect == "postgresql":
+            # One statement: embeddings go in a data-modifying CTE, tags via FK cascade.
+            with self._session_scope() as session:
+                deleted = session.execute(
+                    _PG_DELETE_NOTE_SQL, {"user_id": user_id, "note_id": note_id}
+                ).first()
+                return deleted is not None
+
         with self._session_scope() as session:
             session.query(NoteEmbeddingORM).filter(
                 NoteEmbeddingORM.user_id == user_id,
@@ -1118,15 +2339,15 @@ class NoteStorage:
         Returns:
             List of NoteDTO objects.
         """
-        with self._session_scope() as session:
-            notes = (
-                session.query(NoteORM)
-                .filter(NoteORM.user_id == user_id)
-                .order_by(desc(NoteORM.updated_at))
-                .limit(limit)
-                .all()
-            )
-            return [_note_to_dto(note) for note in notes]
+        stmt = (
+            select(*_NOTE_DTO_COLUMNS)
+            .where(NoteORM.user_id == user_id)
+            .order_by(desc(NoteORM.updated_at))
+            .limit(limit)
+        )
+        with self._session_scope(write=False) as session:
+            rows = session.execute(stmt).mappings().all()
+        return [_mapping_to_note(row) for row in rows]
 
     def save_digest(self, user_id: str, content: str) -> str:
         """
@@ -1140,29 +2361,27 @@ class NoteStorage:
             The ID of the newly created digest.
         """
         digest_id = str(uuid4())
-        now = datetime.utcnow()
-        db_digest = DigestORM(
-            id=digest_id,
-            user_id=user_id,
-            content=content,
-            created_at=now,
-        )
-
+        now = _utcnow()
         with self._session_scope() as session:
-            session.add(db_digest)
+            session.execute(
+                insert(DigestORM).values(
+                    id=digest_id, user_id=user_id, content=content, created_at=now
+                )
+            )
 
         return digest_id
 
     def list_digests(self, user_id: str, limit: int = 50, offset: int = 0) -> list[DigestDTO]:
-        with self._session_scope() as session:
-            digests = (
-                session.query(DigestORM)
-                .filter(DigestORM.user_id == user_id)
-                .order_by(desc(DigestORM.created_at))
-                .offset(max(offset, 0))
-                .limit(max(1, limit))
-                .all()
-            )
+        offset, limit = max(offset, 0), max(1, limit)
+        stmt = lambda_stmt(
+            lambda: select(DigestORM.__table__)
+            .where(DigestORM.user_id == user_id)
+            .order_by(desc(DigestORM.created_at))
+            .offset(offset)
+            .limit(limit)
+        )
+        with self._session_scope(write=False) as session:
+            digests = session.execute(stmt).all()
             return [
                 DigestDTO(
                     id=d.id,
@@ -1174,12 +2393,8 @@ class NoteStorage:
             ]
 
     def get_digest(self, user_id: str, digest_id: str) -> DigestDTO | None:
-        with self._session_scope() as session:
-            d = (
-                session.query(DigestORM)
-                .filter(DigestORM.user_id == user_id, DigestORM.id == digest_id)
-                .one_or_none()
-            )
+        with self._session_scope(write=False) as session:
+            d = _get_for_user(session, DigestORM, user_id, digest_id)
             if not d:
                 return None
             return DigestDTO(id=d.id, user_id=d.user_id, content=d.content, created_at=d.created_at)
@@ -1203,8 +2418,8 @@ class NoteStorage:
         source_scores_json: str | None = None,
     ) -> str:
         ask_id = str(uuid4())
-        now = datetime.utcnow()
-        row = AskHistoryORM(
+        now = _utcnow()
+        stmt = insert(AskHistoryORM).values(
             id=ask_id,
             user_id=user_id,
             query=query,
@@ -1215,7 +2430,7 @@ class NoteStorage:
             created_at=now,
         )
         with self._session_scope() as session:
-            session.add(row)
+            session.execute(stmt)
         return ask_id
 
     def list_ask_history(
@@ -1224,15 +2439,16 @@ class NoteStorage:
         limit: int = 50,
         offset: int = 0,
     ) -> list[AskHistoryDTO]:
-        with self._session_scope() as session:
-            rows = (
-                session.query(AskHistoryORM)
-                .filter(AskHistoryORM.user_id == user_id)
-                .order_by(desc(AskHistoryORM.created_at))
-                .offset(max(offset, 0))
-                .limit(max(1, limit))
-                .all()
-            )
+        offset, limit = max(offset, 0), max(1, limit)
+        stmt = lambda_stmt(
+            lambda: select(AskHistoryORM.__table__)
+            .where(AskHistoryORM.user_id == user_id)
+            .order_by(desc(AskHistoryORM.created_at))
+            .offset(offset)
+            .limit(limit)
+        )
+        with self._session_scope(write=False) as session:
+            rows = session.execute(stmt).all()
             return [
                 AskHistoryDTO(
                     id=r.id,
@@ -1248,12 +2464,8 @@ class NoteStorage:
             ]
 
     def get_ask_history(self, user_id: str, ask_id: str) -> AskHistoryDTO | None:
-        with self._session_scope() as session:
-            r = (
-                session.query(AskHistoryORM)
-                .filter(AskHistoryORM.user_id == user_id, AskHistoryORM.id == ask_id)
-                .one_or_none()
-            )
+        with self._session_scope(write=False) as session:
+            r = _get_for_user(session, AskHistoryORM, user_id, ask_id)
             if not r:
                 return None
             return AskHistoryDTO(
@@ -1291,31 +2503,55 @@ class NoteStorage:
         }
         order_column = order_map.get(order_by, NoteORM.updated_at)
 
-        with self._session_scope() as session:
-            query = session.query(NoteORM).filter(NoteORM.user_id == user_id)
+        stmt = select(*_NOTE_DTO_COLUMNS).where(NoteORM.user_id == user_id)
+        if folder:
+            stmt = stmt.where(self._folder_filter_clause(folder))
+        stmt = stmt.order_by(desc(order_column)).offset(max(offset, 0)).limit(max(limit, 1))
 
-            if folder:
-                query = query.filter(self._folder_filter_clause(folder))
+        with self._session_scope(write=False) as session:
+            rows = session.execute(stmt).mappings().all()
+        return [_mapping_to_note(row) for row in rows]
 
-            notes = (
-                query.order_by(desc(order_column))
-                .offset(max(offset, 0))
-                .limit(max(limit, 1))
-                .all()
-            )
-
-            return [_note_to_dto(note) for note in notes]
-
-    def search_notes(self, user_id: str, query: str, limit: int = 50) -> list[SearchResult]:
+    def search_notes(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 50,
+        *,
+        candidate_note_ids: list[str] | None = None,
+    ) -> list[SearchResult]:
+        """
+        Full-text search. `candidate_note_ids` (SQLite only) restricts the matches, so
+        `limit` applies to the filtered set rather than to all of the user's notes.
+        """
         if not query or not query.strip():
             return []
 
         if self.dialect == "sqlite":
-            return self._search_notes_sqlite(user_id, query, limit)
+            if candidate_note_ids is not None and not candidate_note_ids:
+                return []
+            return self._search_notes_sqlite(user_id, query, limit, candidate_note_ids)
         return self._search_notes_postgres(user_id, query, limit)
 
     def get_folder_tree(self, user_id: str) -> FolderNode:
-        with self._session_scope() as session:
+        """
+        Return the user's folder hierarchy with per-folder note counts.
+
+        The tree is cached per user and reused while the notes watermark (row count,
+        latest updated_at) is unchanged, which also catches writes from other
+        processes. Callers must treat the returned tree as read-only.
+        """
+        with self._session_scope(write=False) as session:
+            count, max_updated_at = (
+                session.query(func.count(NoteORM.id), func.max(NoteORM.updated_at))
+                .filter(NoteORM.user_id == user_id)
+                .one()
+            )
+            watermark = (int(count or 0), max_updated_at)
+            cached = self._folder_trees.get(user_id)
+            if cached is not None and cached[0] == watermark:
+                return cached[1]
+
             rows = (
                 session.query(NoteORM.folder_path, func.count(NoteORM.id))
                 .filter(NoteORM.user_id == user_id)
@@ -1323,72 +2559,80 @@ class NoteStorage:
                 .order_by(NoteORM.folder_path)
                 .all()
             )
-        return _build_folder_tree(rows)
-
-    def get_all_tags(self, user_id: str) -> list[str]:
-        with self._session_scope() as session:
-            rows = (
-                session.query(NoteORM.tags)
-                .filter(NoteORM.user_id == user_id, NoteORM.tags.isnot(None))
-                .all()
-            )
+        tree = _build_folder_tree(rows)
+        self._folder_trees.put(user_id, (watermark, tree))
+        return tree
 
-        tags: set[str] = set()
-        for (value,) in rows:
-            tags.update(_deserialize_tags(value))
-
-        return sorted(tags)
+    def get_all_tags(self, user_id: str) -> list[str]:
+        with self._session_scope(write=False) as session:
+            rows = session.execute(
+                select(NoteTagORM.tag)
+                .where(NoteTagORM.user_id == user_id)
+                .distinct()
+            ).scalars()
+            return sorted(rows)
 
     def get_notes_by_tag(self, user_id: str, tag: str, limit: int = 50) -> list[NoteDTO]:
-        with self._session_scope() as session:
-            query = session.query(NoteORM).filter(NoteORM.user_id == user_id)
-
-            if self.dialect == "postgresql":
-                contains = cast(NoteORM.tags, JSONB).op("@>")(json.dumps([tag]))
-                query = query.filter(contains)
-            else:
-                query = query.filter(NoteORM.tags.like(f'%"{tag}"%'))
-
-            notes = query.order_by(NoteORM.updated_at.desc()).limit(limit).all()
-            return [_note_to_dto(note) for note in notes]
+        stmt = (
+            select(*_NOTE_DTO_COLUMNS)
+            .join(NoteTagORM, NoteTagORM.note_id == NoteORM.id)
+            .where(
+                NoteORM.user_id == user_id,
+                NoteTagORM.user_id == user_id,
+                NoteTagORM.tag == tag,
+            )
+            .order_by(NoteORM.updated_at.desc())
+            .limit(limit)
+        )
+        with self._session_scope(write=False) as session:
+            rows = session.execute(stmt).mappings().all()
+        return [_mapping_to_note(row) for row in rows]
 
     def get_note_count(self, user_id: str, folder: str | None = None) -> int:
-        with self._session_scope() as session:
+        with self._session_scope(write=False) as session:
             query = session.query(func.count(NoteORM.id)).filter(NoteORM.user_id == user_id)
             if folder:
                 query = query.filter(self._folder_filter_clause(folder))
             return int(query.scalar() or 0)
 
     def get_folder_stats(self, user_id: str, folder: str) -> FolderStats | None:
-        with self._session_scope() as session:
-            base_query = session.query(
-                func.count(NoteORM.id),
-                func.sum(NoteORM.transcription_duration),
-                func.avg(NoteORM.confidence),
-            ).filter(NoteORM.user_id == user_id, self._folder_filter_clause(folder))
-
-            count, total_duration, avg_confidence = base_query.one()
-
-            if count == 0:
-                return None
-
-            tag_rows = (
-                session.query(NoteORM.tags)
-                .filter(
-                    NoteORM.user_id == user_id,
-                    NoteORM.tags.isnot(None),
-                    self._folder_filter_clause(folder),
-                )
-                .all()
+        # One round-trip: the single aggregate row is outer-joined to the top-5 tag
+        # rows, so it repeats on each tag row (or appears once with a NULL tag).
+        stats = (
+            select(
+                func.count(NoteORM.id).label("note_count"),
+                func.sum(NoteORM.transcription_duration).label("total_duration"),
+                func.avg(NoteORM.confidence).label("avg_confidence"),
             )
+            .where(NoteORM.user_id == user_id, self._folder_filter_clause(folder))
+            .subquery()
+        )
+        tag_count = func.count(NoteTagORM.note_id).label("tag_count")
+        tag_rows = (
+            select(NoteTagORM.tag, tag_count)
+            .join(NoteORM, NoteORM.id == NoteTagORM.note_id)
+            .where(
+                NoteTagORM.user_id == user_id,
+                NoteORM.user_id == user_id,
+                self._folder_filter_clause(folder),
+            )
+            .group_by(NoteTagORM.tag)
+            .order_by(tag_count.desc(), NoteTagORM.tag)
+            .limit(5)
+            .subquery()
+        )
+        stmt = (
+            select(stats, tag_rows.c.tag)
+            .select_from(stats.outerjoin(tag_rows, true()))
+            .order_by(tag_rows.c.tag_count.desc(), tag_rows.c.tag)
+        )
+        with self._session_scope(write=False) as session:
+            rows = session.execute(stmt).all()
 
-        tag_counts: dict[str, int] = {}
-        for (value,) in tag_rows:
-            for tag in _deserialize_tags(value):
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
-
-        most_common = sorted(tag_counts.items(), key=lambda item: item[1], reverse=True)[:5]
-        top_tags = [tag for tag, _ in most_common]
+        count, total_duration, avg_confidence, _ = rows[0]
+        if count == 0:
+            return None
+        top_tags = [row.tag for row in rows if row.tag is not None]
 
         return FolderStats(
             path=folder,
@@ -1398,46 +2642,26 @@ class NoteStorage:
             most_common_tags=top_tags,
         )
 
-    def _search_notes_sqlite(self, user_id: str, query: str, limit: int) -> list[SearchResult]:
-        fts_table = getattr(self, "sqlite_fts_table", "notes_fts")
-        sql = text(
-            f"""
-            SELECT 
-                n.id,
-                n.user_id,
-                n.title,
-                n.content,
-                n.folder_path,
-                n.tags,
-                n.created_at,
-                n.updated_at,
-                n.word_count,
-                n.confidence,
-                n.transcription_duration,
-                n.model_version,
-                {fts_table}.rank AS rank,
-                snippet({fts_table}, 2, '<mark>', '</mark>', '...', 50) AS snippet
-            FROM {fts_table}
-            JOIN notes n ON {fts_table}.note_id = n.id
-            WHERE n.user_id = :user_id AND {fts_table} MATCH :match_query
-            ORDER BY rank
-            LIMIT :limit
-            """
+    def _search_notes_sqlite(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        candidate_note_ids: list[str] | None = None,
+    ) -> list[SearchResult]:
+        sql = _sqlite_fts_search_sql(
+            getattr(self, "sqlite_fts_table", "notes_fts"), candidate_note_ids is not None
         )
+        params: dict[str, Any] = {
+            "user_id": user_id,
+            "match_query": query,
+            "limit": max(limit, 1),
+        }
+        if candidate_note_ids is not None:
+            params["note_ids"] = candidate_note_ids
 
-        with self._session_scope() as session:
-            rows = (
-                session.execute(
-                    sql,
-                    {
-                        "user_id": user_id,
-                        "match_query": query,
-                        "limit": max(limit, 1),
-                    },
-                )
-                .mappings()
-                .all()
-            )
+        with self._session_scope(write=False) as session:
+            rows = session.execute(sql, params).mappings().all()
 
         results: list[SearchResult] = []
         for row in rows:
@@ -1455,13 +2679,9 @@ class NoteStorage:
     def _search_notes_postgres(self, user_id: str, query: str, limit: int) -> list[SearchResult]:
         ts_query = func.plainto_tsquery("english", query)
 
-        title_vector = func.setweight(func.to_tsvector("english", func.coalesce(NoteORM.title, "")), "A")
-        content_vector = func.setweight(func.to_tsvector("english", func.coalesce(NoteORM.content, "")), "B")
-        tags_vector = func.setweight(
-            func.to_tsvector("english", func.coalesce(cast(NoteORM.tags, Text), "")),
-            "C",
-        )
-        search_vector = title_vector.op("||")(content_vector).op("||")(tags_vector)
+        # Stored generated column with a GIN index (migration g7h8i9j0k1l2); it exists
+        # only on Postgres, so it is not mapped on NoteORM.
+        search_vector = literal_column("notes.search_tsv")
         rank_expr = func.ts_rank_cd(search_vector, ts_query)
         snippet_expr = func.ts_headline(
             "english",
@@ -1470,30 +2690,62 @@ class NoteStorage:
             "MaxWords=50, MinWords=25, ShortWord=3",
         )
 
-        with self._session_scope() as session:
-            rows = (
-                session.query(NoteORM, rank_expr.label("rank"), snippet_expr.label("snippet"))
-                .filter(NoteORM.user_id == user_id)
-                .filter(search_vector.op("@@")(ts_query))
-                .order_by(desc("rank"))
+        with self._session_scope(write=False) as session:
+            rows = session.execute(
+                select(
+                    *_NOTE_DTO_COLUMNS,
+                    rank_expr.label("search_rank"),
+                    snippet_expr.label("search_snippet"),
+                )
+                .where(NoteORM.user_id == user_id, search_vector.op("@@")(ts_query))
+                .order_by(desc("search_rank"))
                 .limit(max(limit, 1))
-                .all()
+            ).mappings().all()
+
+        return [
+            SearchResult(
+                note=_mapping_to_note(row),
+                rank=float(row["search_rank"] or 0.0),
+                snippet=row["search_snippet"] or "",
             )
+            for row in rows
+        ]
 
-        results: list[SearchResult] = []
-        for note, rank_value, snippet in rows:
-            results.append(
-                SearchResult(
-                    note=_note_to_dto(note),
-                    rank=float(rank_value or 0.0),
-                    snippet=snippet or "",
+    def _folder_filter_clause(self, *folders: str):
+        """Match notes in any of `folders` or their subfolders."""
+        if self.dialect == "sqlite":
+            # SQLite's LIKE is case-insensitive, so it cannot use idx_notes_user_folder;
+            # a range under the BINARY collation can. "0" is the byte after "/", so
+            # [folder, folder + "0") covers the folder and everything below it; the
+            # inner OR then drops siblings such as "folder-old". Several folders become
+            # a MULTI-INDEX OR of range scans. Subfolders therefore match case-sensitively,
+            # as they do under Postgres' LIKE.
+            return or_(
+                *(
+                    and_(
+                        NoteORM.folder_path >= folder,
+                        NoteORM.folder_path < f"{folder}0",
+                        or_(
+                            NoteORM.folder_path == folder,
+                            NoteORM.folder_path >= f"{folder}/",
+                        ),
+                    )
+                    for folder in folders
                 )
             )
-        return results
-
-    def _folder_filter_clause(self, folder: str):
-        like_pattern = f"{folder}/%"
-        return or_(NoteORM.folder_path == folder, NoteORM.folder_path.like(like_pattern))
+        if len(folders) == 1:
+            folder = folders[0]
+            return or_(NoteORM.folder_path == folder, NoteORM.folder_path.like(f"{folder}/%"))
+        # Several folders: one expanding IN for exact matches, and on Postgres a single
+        # LIKE ANY over an array, so the statement shape does not grow with the count.
+        prefixes = [f"{folder}/%" for folder in folders]
+        if self.dialect == "postgresql":
+            prefix_match = NoteORM.folder_path.like(
+                any_(bindparam("folder_prefixes", prefixes, type_=ARRAY(Text), unique=True))
+            )
+        else:
+            prefix_match = or_(*(NoteORM.folder_path.like(prefix) for prefix in prefixes))
+        return or_(NoteORM.folder_path.in_(folders), prefix_match)
 
     # =========================================================================
     # USER SETTINGS METHODS
@@ -1503,27 +2755,32 @@ class NoteStorage:
         """
         Get user settings, creating defaults if not found.
         """
-        with self._session_scope() as session:
-            settings = (
-                session.query(UserSettingsORM)
-                .filter(UserSettingsORM.user_id == user_id)
-                .one_or_none()
-            )
+        stmt = lambda_stmt(
+            lambda: select(UserSettingsORM).where(UserSettingsORM.user_id == user_id)
+        )
+        # Settings exist for every returning user, so look them up without a COMMIT and
+        # only open a write transaction on first use.
+        with self._session_scope(write=False) as session:
+            settings = session.scalars(stmt).one_or_none()
             if settings:
                 return _user_settings_to_dto(settings)
 
-            # Create default settings
-            settings_id = str(uuid4())
-            now = datetime.utcnow()
-            new_settings = UserSettingsORM(
-                id=settings_id,
-                user_id=user_id,
-                auto_accept_todos=False,
-                created_at=now,
-                updated_at=now,
+        with self._session_scope() as session:
+            # Create default settings; DO NOTHING covers a concurrent first request
+            # that inserted them in the meantime.
+            now = _utcnow()
+            session.execute(
+                self._insert_for_upsert(UserSettingsORM)
+                .values(
+                    id=str(uuid4()),
+                    user_id=user_id,
+                    auto_accept_todos=False,
+                    created_at=now,
+                    updated_at=now,
+                )
+                .on_conflict_do_nothing(index_elements=[UserSettingsORM.user_id])
             )
-            session.add(new_settings)
-            return _user_settings_to_dto(new_settings)
+            return _user_settings_to_dto(session.scalars(stmt).one())
 
     def update_user_settings(
         self,
@@ -1534,31 +2791,29 @@ class NoteStorage:
         """
         Update user settings, creating if not found.
         """
-        with self._session_scope() as session:
-            settings = (
-                session.query(UserSettingsORM)
-                .filter(UserSettingsORM.user_id == user_id)
-                .one_or_none()
-            )
-            now = datetime.utcnow()
+        now = _utcnow()
+        stmt = self._insert_for_upsert(UserSettingsORM).values(
+            id=str(uuid4()),
+            user_id=user_id,
+            auto_accept_todos=auto_accept_todos if auto_accept_todos is not None else False,
+            created_at=now,
+            updated_at=now,
+        )
+        set_: dict[str, Any] = {"updated_at": stmt.excluded.updated_at}
+        if auto_accept_todos is not None:
+            set_["auto_accept_todos"] = stmt.excluded.auto_accept_todos
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserSettingsORM.user_id], set_=set_
+        ).returning(UserSettingsORM)
 
-            if not settings:
-                # Create with the provided values
-                settings = UserSettingsORM(
-                    id=str(uuid4()),
-                    user_id=user_id,
-                    auto_accept_todos=auto_accept_todos if auto_accept_todos is not None else False,
-                    created_at=now,
-                    updated_at=now,
-                )
-                session.add(settings)
-            else:
-                if auto_accept_todos is not None:
-                    settings.auto_accept_todos = auto_accept_todos
-                settings.updated_at = now
-                session.add(settings)
+        with self._session_scope() as session:
+            return _user_settings_to_dto(session.scalars(stmt).one())
 
-            return _user_settings_to_dto(settings)
+    def _insert_for_upsert(self, model: type[Any]):
+        """Dialect-specific insert() that supports ON CONFLICT (SQLite and Postgres)."""
+        if self.dialect == "postgresql":
+            return pg_insert(model)
+        return sqlite_insert(model)
 
     # =========================================================================
     # TODO METHODS
@@ -1578,50 +2833,59 @@ class NoteStorage:
         """
         Create a new todo.
         """
-        todo_id = str(uuid4())
-        now = datetime.utcnow()
+        return self.create_todos_bulk(
+            user_id,
+            [
+                {
+                    "title": title,
+                    "note_id": note_id,
+                    "description": description,
+                    "status": status,
+                    "confidence": confidence,
+                    "extraction_context": extraction_context,
+                }
+            ],
+        )[0]
 
-        todo = TodoORM(
-            id=todo_id,
-            user_id=user_id,
-            note_id=note_id,
-            title=title,
-            description=description,
-            status=status,
-            confidence=confidence,
-            extraction_context=extraction_context,
-            created_at=now,
-            updated_at=now,
-            completed_at=None,
-        )
+    def create_todos_bulk(self, user_id: str, todos: list[Mapping[str, Any]]) -> list[TodoDTO]:
+        """
+        Create many todos with one multi-row INSERT.
+
+        Each mapping takes the keyword arguments of `create_todo` (`title` required;
+        `note_id`, `description`, `status`, `confidence`, `extraction_context` optional).
+        """
+        if not todos:
+            return []
+
+        now = _utcnow()
+        rows = [
+            {
+                "id": str(uuid4()),
+                "user_id": user_id,
+                "note_id": todo.get("note_id"),
+                "title": todo["title"],
+                "description": todo.get("description"),
+                "status": todo.get("status") or "suggested",
+                "confidence": todo.get("confidence"),
+                "extraction_context": todo.get("extraction_context"),
+                "created_at": now,
+                "updated_at": now,
+                "completed_at": None,
+            }
+            for todo in todos
+        ]
 
         with self._session_scope() as session:
-            session.add(todo)
+            session.execute(insert(TodoORM), rows)
 
-        return TodoDTO(
-            id=todo_id,
-            user_id=user_id,
-            note_id=note_id,
-            title=title,
-            description=description,
-            status=status,
-            confidence=confidence,
-            extraction_context=extraction_context,
-            created_at=now,
-            updated_at=now,
-            completed_at=None,
-        )
+        return [TodoDTO(**row) for row in rows]
 
     def get_todo(self, user_id: str, todo_id: str) -> TodoDTO | None:
         """
         Get a single todo by ID.
         """
-        with self._session_scope() as session:
-            todo = (
-                session.query(TodoORM)
-                .filter(TodoORM.user_id == user_id, TodoORM.id == todo_id)
-                .one_or_none()
-            )
+        with self._session_scope(write=False) as session:
+            todo = _get_for_user(session, TodoORM, user_id, todo_id)
             return _todo_to_dto(todo) if todo else None
 
     def list_todos(
@@ -1636,33 +2900,32 @@ class NoteStorage:
         """
         List todos with optional filters.
         """
-        with self._session_scope() as session:
-            query = session.query(TodoORM).filter(TodoORM.user_id == user_id)
-
-            if status:
-                query = query.filter(TodoORM.status == status)
-            if note_id:
-                query = query.filter(TodoORM.note_id == note_id)
-
-            todos = (
-                query.order_by(desc(TodoORM.created_at))
-                .offset(max(offset, 0))
-                .limit(max(limit, 1))
-                .all()
-            )
+        offset, limit = max(offset, 0), max(limit, 1)
+        # Each optional filter is its own lambda, so every filter combination gets
+        # a cached compiled form of its own.
+        stmt = lambda_stmt(lambda: select(TodoORM.__table__).where(TodoORM.user_id == user_id))
+        if status:
+            stmt += lambda s: s.where(TodoORM.status == status)
+        if note_id:
+            stmt += lambda s: s.where(TodoORM.note_id == note_id)
+        stmt += lambda s: s.order_by(desc(TodoORM.created_at)).offset(offset).limit(limit)
+
+        with self._session_scope(write=False) as session:
+            todos = session.execute(stmt).all()
             return [_todo_to_dto(t) for t in todos]
 
     def list_todos_for_note(self, user_id: str, note_id: str) -> list[TodoDTO]:
         """
         List all todos for a specific note.
         """
-        with self._session_scope() as session:
-            todos = (
-                session.query(TodoORM)
-                .filter(TodoORM.user_id == user_id, TodoORM.note_id == note_id)
-                .order_by(desc(TodoORM.created_at))
-                .all()
-            )
+        with self._session_scope(write=False) as session:
+            todos = session.execute(
+                lambda_stmt(
+                    lambda: select(TodoORM.__table__)
+                    .where(TodoORM.user_id == user_id, TodoORM.note_id == note_id)
+                    .order_by(desc(TodoORM.created_at))
+                )
+            ).all()
             return [_todo_to_dto(t) for t in todos]
 
     def update_todo(
@@ -1676,22 +2939,28 @@ class NoteStorage:
         """
         Update a todo's title or description.
         """
-        with self._session_scope() as session:
-            todo = (
-                session.query(TodoORM)
-                .filter(TodoORM.user_id == user_id, TodoORM.id == todo_id)
-                .one_or_none()
-            )
-            if not todo:
-                return None
+        values: dict[str, Any] = {"updated_at": _utcnow()}
+        if title is not None:
+            values["title"] = title
+        if description is not None:
+            values["description"] = description
+        return self._update_todo_returning(user_id, todo_id, values)
 
-            if title is not None:
-                todo.title = title
-            if description is not None:
-                todo.description = description
-            todo.updated_at = datetime.utcnow()
-            session.add(todo)
-            return _todo_to_dto(todo)
+    def _update_todo_returning(
+        self, user_id: str, todo_id: str, values: dict[str, Any]
+    ) -> TodoDTO | None:
+        """Apply `values` with a single UPDATE ... RETURNING and return the updated todo."""
+        stmt = (
+            update(TodoORM)
+            .where(TodoORM.user_id == user_id, TodoORM.id == todo_id)
+            .values(**values)
+            .returning(TodoORM)
+        )
+        with self._session_scope() as session:
+            todo = session.scalars(
+                stmt, execution_options={"synchronize_session": False}
+            ).one_or_none()
+            return _todo_to_dto(todo) if todo else None
 
     def delete_todo(self, user_id: str, todo_id: str) -> bool:
         """
@@ -1709,39 +2978,18 @@ class NoteStorage:
         """
         Accept a suggested todo (change status from suggested to accepted).
         """
-        with self._session_scope() as session:
-            todo = (
-                session.query(TodoORM)
-                .filter(TodoORM.user_id == user_id, TodoORM.id == todo_id)
-                .one_or_none()
-            )
-            if not todo:
-                return None
-
-            todo.status = "accepted"
-            todo.updated_at = datetime.utcnow()
-            session.add(todo)
-            return _todo_to_dto(todo)
+        return self._update_todo_returning(
+            user_id, todo_id, {"status": "accepted", "updated_at": _utcnow()}
+        )
 
     def complete_todo(self, user_id: str, todo_id: str) -> TodoDTO | None:
         """
         Mark a todo as completed.
         """
-        with self._session_scope() as session:
-            todo = (
-                session.query(TodoORM)
-                .filter(TodoORM.user_id == user_id, TodoORM.id == todo_id)
-                .one_or_none()
-            )
-            if not todo:
-                return None
-
-            now = datetime.utcnow()
-            todo.status = "completed"
-            todo.completed_at = now
-            todo.updated_at = now
-            session.add(todo)
-            return _todo_to_dto(todo)
+        now = _utcnow()
+        return self._update_todo_returning(
+            user_id, todo_id, {"status": "completed", "completed_at": now, "updated_at": now}
+        )
 
     def accept_todos_bulk(self, user_id: str, todo_ids: list[str]) -> int:
         """
@@ -1751,21 +2999,40 @@ class NoteStorage:
         if not todo_ids:
             return 0
 
+        stmt = (
+            update(TodoORM)
+            .where(
+                TodoORM.user_id == user_id,
+                TodoORM.id.in_(todo_ids),
+                TodoORM.status == "suggested",
+            )
+            .values(status="accepted", updated_at=_utcnow())
+        )
         with self._session_scope() as session:
-            now = datetime.utcnow()
-            result = (
-                session.query(TodoORM)
-                .filter(
-                    TodoORM.user_id == user_id,
-                    TodoORM.id.in_(todo_ids),
-                    TodoORM.status == "suggested",
-                )
-                .update(
-                    {"status": "accepted", "updated_at": now},
-                    synchronize_session=False,
-                )
+            result = session.execute(stmt, execution_options={"synchronize_session": False})
+            return int(result.rowcount or 0)
+
+    def complete_todos_bulk(self, user_id: str, todo_ids: list[str]) -> int:
+        """
+        Complete multiple todos in one UPDATE.
+        Returns the number of todos completed.
+        """
+        if not todo_ids:
+            return 0
+
+        now = _utcnow()
+        stmt = (
+            update(TodoORM)
+            .where(
+                TodoORM.user_id == user_id,
+                TodoORM.id.in_(todo_ids),
+                TodoORM.status != "completed",
             )
-            return int(result or 0)
+            .values(status="completed", completed_at=now, updated_at=now)
+        )
+        with self._session_scope() as session:
+            result = session.execute(stmt, execution_options={"synchronize_session": False})
+            return int(result.rowcount or 0)
 
     def dismiss_todo(self, user_id: str, todo_id: str) -> bool:
         """
@@ -1796,55 +3063,45 @@ class NoteStorage:
         Returns:
             The ID of the newly created meal entry.
         """
-        from datetime import date as dt_date
-        from datetime import time as dt_time
-
         meal_id = str(uuid4())
-        now = datetime.utcnow()
+        now = _utcnow()
 
-        # Parse date
-        meal_date = dt_date.fromisoformat(metadata.meal_date)
-
-        # Parse time if provided
-        meal_time = None
-        if metadata.meal_time:
-            try:
-                parts = metadata.meal_time.split(":")
-                meal_time = dt_time(int(parts[0]), int(parts[1]))
-            except (ValueError, IndexError):
-                pass
+        meal_date = _parse_meal_date(metadata.meal_date)
+        meal_time = _parse_meal_time(metadata.meal_time) if metadata.meal_time else None
 
-        db_meal = MealEntryORM(
-            id=meal_id,
-            user_id=user_id,
-            meal_type=metadata.meal_type,
-            meal_date=meal_date,
-            meal_time=meal_time,
-            transcription=transcription,
-            confidence=metadata.confidence,
-            transcription_duration=metadata.transcription_duration,
-            model_version=metadata.model_version,
-            created_at=now,
-            updated_at=now,
-        )
+        item_rows = [
+            {
+                "id": str(uuid4()),
+                "user_id": user_id,
+                "meal_entry_id": meal_id,
+                "name": item.get("name", ""),
+                "portion": item.get("portion"),
+                "confidence": item.get("confidence"),
+                "created_at": now,
+            }
+            for item in food_items or []
+        ]
 
+        # Core inserts run in statement order, so the entry exists before its items'
+        # foreign keys are checked; the items go in as one executemany.
         with self._session_scope() as session:
-            session.add(db_meal)
-
-            # Add food items
-            if food_items:
-                for item in food_items:
-                    item_id = str(uuid4())
-                    db_item = MealItemORM(
-                        id=item_id,
-                        user_id=user_id,
-                        meal_entry_id=meal_id,
-                        name=item.get("name", ""),
-                        portion=item.get("portion"),
-                        confidence=item.get("confidence"),
-                        created_at=now,
-                    )
-                    session.add(db_item)
+            session.execute(
+                insert(MealEntryORM).values(
+                    id=meal_id,
+                    user_id=user_id,
+                    meal_type=metadata.meal_type,
+                    meal_date=meal_date,
+                    meal_time=meal_time,
+                    transcription=transcription,
+                    confidence=metadata.confidence,
+                    transcription_duration=metadata.transcription_duration,
+                    model_version=metadata.model_version,
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+            if item_rows:
+                session.execute(insert(MealItemORM), item_rows)
 
         return meal_id
 
@@ -1852,20 +3109,18 @@ class NoteStorage:
         """
         Get a meal entry by ID with its food items.
         """
-        with self._session_scope() as session:
-            entry = (
-                session.query(MealEntryORM)
-                .filter(MealEntryORM.user_id == user_id, MealEntryORM.id == meal_id)
-                .one_or_none()
-            )
+        with self._session_scope(write=False) as session:
+            entry = _get_for_user(session, MealEntryORM, user_id, meal_id)
             if not entry:
                 return None
 
-            items = (
-                session.query(MealItemORM)
-                .filter(MealItemORM.meal_entry_id == meal_id)
-                .all()
-            )
+            items = session.execute(
+                lambda_stmt(
+                    lambda: select(MealItemORM.__table__).where(
+                        MealItemORM.meal_entry_id == meal_id
+                    )
+                )
+            ).all()
             return _meal_entry_to_dto(entry, items)
 
     def update_meal_entry(
@@ -1883,65 +3138,59 @@ class NoteStorage:
         Returns:
             True if updated, False if not found.
         """
-        from datetime import date as dt_date
-        from datetime import time as dt_time
+        values: dict[str, Any] = {}
+        if meal_type is not None:
+            values["meal_type"] = meal_type
+        if meal_date is not None:
+            values["meal_date"] = _parse_meal_date(meal_date)
+        if meal_time is not None:
+            parsed_time = _parse_meal_time(meal_time)
+            if parsed_time is not None:
+                values["meal_time"] = parsed_time
+        if transcription is not None:
+            values["transcription"] = transcription
+        if not values:
+            return False
+        values["updated_at"] = _utcnow()
 
+        # A single UPDATE; its rowcount doubles as the ownership/existence check.
         with self._session_scope() as session:
-            entry = (
-                session.query(MealEntryORM)
-                .filter(MealEntryORM.user_id == user_id, MealEntryORM.id == meal_id)
-                .one_or_none()
+            result = session.execute(
+                update(MealEntryORM)
+                .where(MealEntryORM.user_id == user_id, MealEntryORM.id == meal_id)
+                .values(**values),
+                execution_options={"synchronize_session": False},
             )
-            if not entry:
-                return False
-
-            updated = False
-            if meal_type is not None:
-                entry.meal_type = meal_type
-                updated = True
-            if meal_date is not None:
-                entry.meal_date = dt_date.fromisoformat(meal_date)
-                updated = True
-            if meal_time is not None:
-                try:
-                    parts = meal_time.split(":")
-                    entry.meal_time = dt_time(int(parts[0]), int(parts[1]))
-                    updated = True
-                except (ValueError, IndexError):
-                    pass
-            if transcription is not None:
-                entry.transcription = transcription
-                updated = True
-
-            if updated:
-                entry.updated_at = datetime.utcnow()
-                session.add(entry)
-
-            return updated
+            return result.rowcount > 0
 
     def delete_meal_entry(self, user_id: str, meal_id: str) -> bool:
         """
         Delete a meal entry and its items (cascades).
         """
-        with self._session_scope() as session:
-            # Delete embedding first
-            session.query(MealEmbeddingORM).filter(
-                MealEmbeddingORM.user_id == user_id,
-                MealEmbeddingORM.meal_entry_id == meal_id,
-            ).delete(synchronize_session=False)
-
-            # Items cascade via FK, but let's be explicit
-            session.query(MealItemORM).filter(
-                MealItemORM.user_id == user_id,
-                MealItemORM.meal_entry_id == meal_id,
-            ).delete(synchronize_session=False)
+        if self.dialect == "postgresql":
+            # One statement: the embedding goes in a data-modifying CTE, items via FK cascade.
+            with self._session_scope() as session:
+                deleted = session.execute(
+                    _PG_DELETE_MEAL_ENTRY_SQL, {"user_id": user_id, "meal_id": meal_id}
+                ).first()
+                return deleted is not None
 
-            result = (
-                session.query(MealEntryORM)
-                .filter(MealEntryORM.user_id == user_id, MealEntryORM.id == meal_id)
-                .delete(synchronize_session=False)
+        with self._session_scope() as session:
+            # meal_embeddings has no FK to cascade from; meal_items does (foreign_keys=ON
+            # is set on every SQLite connection). Core deletes: nothing here is in the
+            # identity map to synchronize.
+            session.execute(
+                delete(MealEmbeddingORM).where(
+                    MealEmbeddingORM.user_id == user_id,
+                    MealEmbeddingORM.meal_entry_id == meal_id,
+                )
             )
-            return result > 0
+            result = session.execute(
+                delete(MealEntryORM).where(
+                    MealEntryORM.user_id == user_id, MealEntryORM.id == meal_id
+                )
+            )
+            return result.rowcount > 0
 
     def list_meals_by_date_range(
         self,
@@ -1951,42 +3200,45 @@ class NoteStorage:
         meal_type: str | None = None,
         limit: int = 100,
         offset: int = 0,
+        *,
+        include_transcription: bool = True,
     ) -> list[MealEntryDTO]:
         """
         List meal entries within a date range.
-        """
-        from datetime import date as dt_date
 
-        start = dt_date.fromisoformat(start_date)
-        end = dt_date.fromisoformat(end_date)
-
-        with self._session_scope() as session:
-            query = (
-                session.query(MealEntryORM)
-                .filter(
-                    MealEntryORM.user_id == user_id,
-                    MealEntryORM.meal_date >= start,
-                    MealEntryORM.meal_date <= end,
-                )
-            )
-            if meal_type:
-                query = query.filter(MealEntryORM.meal_type == meal_type)
+        With include_transcription=False the transcription text is not read from the
+        database and each entry's transcription is returned as "".
+        """
+        start = _parse_meal_date(start_date)
+        end = _parse_meal_date(end_date)
+
+        columns = [
+            column if include_transcription or column.key != "transcription"
+            else literal("").label("transcription")
+            for column in MealEntryORM.__table__.c
+        ]
+        stmt = select(*columns).where(
+            MealEntryORM.user_id == user_id,
+            MealEntryORM.meal_date >= start,
+            MealEntryORM.meal_date <= end,
+        )
+        if meal_type:
+            stmt = stmt.where(MealEntryORM.meal_type == meal_type)
 
-            entries = (
-                query.order_by(desc(MealEntryORM.meal_date), desc(MealEntryORM.created_at))
+        with self._session_scope(write=False) as session:
+            entries = session.execute(
+                stmt.order_by(desc(MealEntryORM.meal_date), desc(MealEntryORM.created_at))
                 .offset(max(offset, 0))
                 .limit(max(limit, 1))
-                .all()
-            )
+            ).all()
 
-            # Batch load items for all entries
+            # Batch load items for all entries (one IN query, plain rows)
             entry_ids = [e.id for e in entries]
-            items_map: dict[str, list[MealItemORM]] = {}
+            items_map: dict[str, list[Row[Any]]] = {}
             if entry_ids:
-                all_items = (
-                    session.query(MealItemORM)
-                    .filter(MealItemORM.meal_entry_id.in_(entry_ids))
-                    .all()
+                all_items = session.execute(
+                    select(MealItemORM.__table__)
+                    .where(MealItemORM.meal_entry_id.in_(entry_ids))
                 )
                 for item in all_items:
                     items_map.setdefault(item.meal_entry_id, []).append(item)
@@ -2012,24 +3264,39 @@ class NoteStorage:
         """
         from calendar import monthrange
 
-        first_day = f"{year:04d}-{month:02d}-01"
-        last_day_num = monthrange(year, month)[1]
-        last_day = f"{year:04d}-{month:02d}-{last_day_num:02d}"
-
-        meals = self.list_meals_by_date_range(user_id, first_day, last_day, limit=500)
-
-        result: dict[str, list[dict]] = {}
-        for meal in meals:
-            date_str = meal.meal_date
-            if date_str not in result:
-                result[date_str] = []
-            result[date_str].append({
-                "id": meal.id,
-                "meal_type": meal.meal_type,
-                "item_count": len(meal.items),
-            })
-
-        return result
+        first_day = dt_date(year, month, 1)
+        last_day = dt_date(year, month, monthrange(year, month)[1])
+
+        # The calendar only needs item counts, so count in SQL rather than loading
+        # every MealItem row for the month. Grouping by the entry's primary key keeps
+        # the aggregate to this month's meals.
+        with self._session_scope(write=False) as session:
+            rows = session.execute(
+                select(
+                    MealEntryORM.id,
+                    MealEntryORM.meal_type,
+                    MealEntryORM.meal_date,
+                    func.count(MealItemORM.id),
+                )
+                .outerjoin(MealItemORM, MealItemORM.meal_entry_id == MealEntryORM.id)
+                .where(
+                    MealEntryORM.user_id == user_id,
+                    MealEntryORM.meal_date >= first_day,
+                    MealEntryORM.meal_date <= last_day,
+                )
+                .group_by(MealEntryORM.id)
+                .order_by(desc(MealEntryORM.meal_date), desc(MealEntryORM.created_at))
+                .limit(500)
+            ).all()
+
+        # Rows arrive ordered by meal_date, so each day is one consecutive run.
+        return {
+            meal_date.isoformat(): [
+                {"id": meal_id, "meal_type": meal_type, "item_count": int(item_count)}
+                for meal_id, meal_type, _, item_count in day_rows
+            ]
+            for meal_date, day_rows in groupby(rows, key=itemgetter(2))
+        }
 
     def add_meal_item(
         self, user_id: str, meal_id: str, name: str, portion: str | None = None
@@ -2037,26 +3304,26 @@ class NoteStorage:
         """
         Add a food item to an existing meal entry.
         """
-        # Verify meal exists and belongs to user
-        entry = self.get_meal_entry(user_id, meal_id)
-        if not entry:
-            return None
-
         item_id = str(uuid4())
-        now = datetime.utcnow()
-
-        db_item = MealItemORM(
-            id=item_id,
-            user_id=user_id,
-            meal_entry_id=meal_id,
-            name=name,
-            portion=portion,
-            confidence=None,
-            created_at=now,
+        now = _utcnow()
+
+        # INSERT ... SELECT from the user's entry: the ownership check and the insert
+        # are one statement, and nothing is inserted when the entry is missing.
+        items = MealItemORM.__table__
+        stmt = insert(MealItemORM).from_select(
+            ["id", "user_id", "meal_entry_id", "name", "portion", "created_at"],
+            select(
+                literal(item_id, items.c.id.type),
+                MealEntryORM.user_id,
+                MealEntryORM.id,
+                literal(name, items.c.name.type),
+                literal(portion, items.c.portion.type),
+                literal(now, items.c.created_at.type),
+            ).where(MealEntryORM.user_id == user_id, MealEntryORM.id == meal_id),
         )
-
         with self._session_scope() as session:
-            session.add(db_item)
+            if session.execute(stmt).rowcount == 0:
+                return None
 
         return MealItemDTO(
             id=item_id,
@@ -2079,11 +3346,7 @@ class NoteStorage:
         Update a food item.
         """
         with self._session_scope() as session:
-            item = (
-                session.query(MealItemORM)
-                .filter(MealItemORM.user_id == user_id, MealItemORM.id == item_id)
-                .one_or_none()
-            )
+            item = _get_for_user(session, MealItemORM, user_id, item_id)
             if not item:
                 return None
 
@@ -2092,7 +3355,6 @@ class NoteStorage:
             if portion is not None:
                 item.portion = portion
 
-            session.add(item)
             return _meal_item_to_dto(item)
 
     def delete_meal_item(self, user_id: str, item_id: str) -> bool:
@@ -2100,12 +3362,14 @@ class NoteStorage:
         Delete a food item.
         """
         with self._session_scope() as session:
-            result = (
-                session.query(MealItemORM)
-                .filter(MealItemORM.user_id == user_id, MealItemORM.id == item_id)
-                .delete(synchronize_session=False)
+            result = session.execute(
+                lambda_stmt(
+                    lambda: delete(MealItemORM).where(
+                        MealItemORM.user_id == user_id, MealItemORM.id == item_id
+                    )
+                )
             )
-            return result > 0
+            return result.rowcount > 0
 
     def upsert_meal_embedding(
         self,
@@ -2118,35 +3382,27 @@ class NoteStorage:
         """
         Upsert a meal embedding (user-scoped).
         """
-        now = datetime.utcnow()
+        now = _utcnow()
+        insert_stmt = self._insert_for_upsert(MealEmbeddingORM).values(
+            id=str(uuid4()),
+            user_id=user_id,
+            meal_entry_id=meal_entry_id,
+            embedding_model=embedding_model,
+            content_hash=content_hash,
+            embedding=embedding_value,
+            created_at=now,
+            updated_at=now,
+        )
+        stmt = insert_stmt.on_conflict_do_update(
+            index_elements=["user_id", "meal_entry_id", "embedding_model"],
+            set_={
+                "content_hash": insert_stmt.excluded.content_hash,
+                "embedding": insert_stmt.excluded.embedding,
+                "updated_at": now,
+            },
+        )
         with self._session_scope() as session:
-            existing = (
-                session.query(MealEmbeddingORM)
-                .filter(
-                    MealEmbeddingORM.user_id == user_id,
-                    MealEmbeddingORM.meal_entry_id == meal_entry_id,
-                    MealEmbeddingORM.embedding_model == embedding_model,
-                )
-                .one_or_none()
-            )
-            if existing:
-                existing.content_hash = content_hash
-                existing.embedding = embedding_value
-                existing.updated_at = now
-                session.add(existing)
-                return
-
-            db_emb = MealEmbeddingORM(
-                id=str(uuid4()),
-                user_id=user_id,
-                meal_entry_id=meal_entry_id,
-                embedding_model=embedding_model,
-                content_hash=content_hash,
-                embedding=embedding_value,
-                created_at=now,
-                updated_at=now,
-            )
-            session.add(db_emb)
+            session.execute(stmt)
 
     # =========================================================================
     # FEEDBACK METHODS
@@ -2164,7 +3420,7 @@ class NoteStorage:
         Create a new feedback submission.
         """
         feedback_id = str(uuid4())
-        now = datetime.utcnow()
+        now = _utcnow()
 
         feedback = FeedbackORM(
             id=feedback_id,
@@ -2199,15 +3455,16 @@ class NoteStorage:
         """
         List feedback submissions for a user.
         """
-        with self._session_scope() as session:
-            rows = (
-                session.query(FeedbackORM)
-                .filter(FeedbackORM.user_id == user_id)
-                .order_by(desc(FeedbackORM.created_at))
-                .offset(max(offset, 0))
-                .limit(max(limit, 1))
-                .all()
-            )
+        offset, limit = max(offset, 0), max(limit, 1)
+        stmt = lambda_stmt(
+            lambda: select(FeedbackORM.__table__)
+            .where(FeedbackORM.user_id == user_id)
+            .order_by(desc(FeedbackORM.created_at))
+            .offset(offset)
+            .limit(limit)
+        )
+        with self._session_scope(write=False) as session:
+            rows = session.execute(stmt)
             return [
                 FeedbackDTO(
                     id=f.id,
@@ -2240,7 +3497,6 @@ class NoteStorage:
             if not feedback:
                 return False
             feedback.email_sent = True
-            session.add(feedback)
             return True
 
     def _configure_engine(
@@ -2249,36 +3505,22 @@ class NoteStorage:
         database_url: str | None,
     ) -> tuple[Engine, sessionmaker]:
         if database_url:
-            engine = create_engine_for_url(database_url)
-            factory = sessionmaker(
-                bind=engine,
-                autocommit=False,
-                autoflush=False,
-                expire_on_commit=False,
-                future=True,
-            )
-            return engine, factory
+            return _engine_for_url(database_url)
 
         if db_path:
-            resolved = Path(db_path).resolve()
-            engine = create_engine_for_url(f"sqlite:///{resolved}")
-            factory = sessionmaker(
-                bind=engine,
-                autocommit=False,
-                autoflush=False,
-                expire_on_commit=False,
-                future=True,
-            )
-            return engine, factory
+            return _engine_for_url(f"sqlite:///{Path(db_path).resolve()}")
 
         return get_engine(), get_session_factory()
 
     @contextmanager
-    def _session_scope(self) -> Generator[Session, None, None]:
+    def _session_scope(self, *, write: bool = True) -> Generator[Session, None, None]:
+        # Readers pass write=False: their transaction is simply released on close()
+        # (the pool rolls it back) instead of going through flush + COMMIT.
         session = self.session_factory()
         try:
             yield session
-            session.commit()
+            if write:
+                session.commit()
         except Exception:
             session.rollback()
             raise
@@ -50,6 +50,31 @@ def run_migrations():
         return 1
 
 
+def apply_embeddings_unlogged():
+    """Convert note_embeddings to UNLOGGED when EMBEDDINGS_UNLOGGED is set (PostgreSQL only)"""
+    from app.database import (
+        create_engine_for_url,
+        embeddings_unlogged_requested,
+        set_embeddings_unlogged,
+    )
+
+    if not embeddings_unlogged_requested():
+        return 0
+
+    try:
+        engine = create_engine_for_url()
+        try:
+            if set_embeddings_unlogged(engine):
+                print("✅ note_embeddings converted to UNLOGGED")
+        finally:
+            engine.dispose()
+        return 0
+
+    except Exception as e:
+        print(f"❌ UNLOGGED conversion failed: {e}")
+        return 1
+
+
 if __name__ == "__main__":
-    sys.exit(run_migrations())
+    sys.exit(run_migrations() or apply_embeddings_unlogged())
 
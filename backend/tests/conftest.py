@@ -0,0 +1,18 @@
+"""Shared pytest fixtures."""
+
+from collections.abc import Generator
+
+import pytest
+
+from app.services import storage as storage_module
+
+
+@pytest.fixture(autouse=True)
+def _reset_storage_caches() -> Generator[None, None, None]:
+    # Tests delete and recreate SQLite files at fixed paths; start each one without
+    # pooled connections to, or a cached schema check of, a previous test's file.
+    yield
+    for engine, _ in storage_module._ENGINES.values():  # noqa: SLF001 - test isolation
+        engine.dispose()
+    storage_module._ENGINES.clear()  # noqa: SLF001 - test isolation
+    storage_module._SQLITE_SCHEMA_CACHE.clear()  # noqa: SLF001 - test isolation
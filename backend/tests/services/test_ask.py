@@ -12,10 +12,13 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
+import pytest
+
 # Add backend directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.database import Note as NoteORM
+from app.database import NoteEmbedding as NoteEmbeddingORM
 from app.services.embeddings import vector_to_json
 from app.services.models import NoteMetadata
 from app.services.storage import NoteStorage
@@ -93,6 +96,152 @@ def test_semantic_search_is_user_scoped() -> None:
     test_db.with_suffix(".db-shm").unlink(missing_ok=True)
 
 
+def test_semantic_search_sees_reembedded_notes() -> None:
+    test_db = Path("test_ask_reembed.db").resolve()
+    test_db.unlink(missing_ok=True)
+
+    storage = NoteStorage(db_path=test_db)
+    user_id = "user-r"
+
+    note_x = storage.save_note(
+        user_id=user_id,
+        content="Notes about the garden.",
+        metadata=NoteMetadata(title="Garden", folder_path="home", tags=["garden"]),
+    )
+    note_y = storage.save_note(
+        user_id=user_id,
+        content="Notes about the car.",
+        metadata=NoteMetadata(title="Car", folder_path="home", tags=["car"]),
+    )
+    for note_id, vec in ((note_x, [1.0, 0.0, 0.0]), (note_y, [0.0, 1.0, 0.0])):
+        storage.upsert_note_embedding(
+            user_id=user_id,
+            note_id=note_id,
+            embedding_model="text-embedding-3-small",
+            content_hash=note_id,
+            embedding_value=vector_to_json(vec),
+        )
+
+    query = vector_to_json([0.0, 1.0, 0.0])
+    hits = storage.semantic_search(user_id=user_id, query_embedding_literal=query, limit=1)
+    assert [h["note_id"] for h in hits] == [note_y]
+    assert hits[0]["score"] == 1.0
+
+    # Re-embedding must invalidate the cached matrix used for scoring.
+    storage.upsert_note_embedding(
+        user_id=user_id,
+        note_id=note_y,
+        embedding_model="text-embedding-3-small",
+        content_hash="changed",
+        embedding_value=vector_to_json([0.0, 0.0, 1.0]),
+    )
+    hits = storage.semantic_search(user_id=user_id, query_embedding_literal=query, limit=2)
+    assert {h["note_id"] for h in hits} == {note_x, note_y}
+    assert all(h["score"] == 0.5 for h in hits)
+
+    hits = storage.semantic_search(
+        user_id=user_id,
+        query_embedding_literal=vector_to_json([1.0, 0.0, 0.0]),
+        limit=5,
+        candidate_note_ids=[note_y],
+    )
+    assert [h["note_id"] for h in hits] == [note_y]
+
+    # A pre-parsed query vector gives the same ranking and is not modified.
+    parsed = storage._parse_embedding(query)  # noqa: SLF001 - test helper
+    parsed *= 3.0
+    hits = storage.semantic_search(
+        user_id=user_id, query_embedding_literal=query, limit=2, query_embedding=parsed
+    )
+    assert [h["note_id"] for h in hits] == [
+        h["note_id"]
+        for h in storage.semantic_search(user_id=user_id, query_embedding_literal=query, limit=2)
+    ]
+    assert parsed.tolist() == [0.0, 3.0, 0.0]
+
+    # Cleanup
+    test_db.unlink(missing_ok=True)
+    test_db.with_suffix(".db-wal").unlink(missing_ok=True)
+    test_db.with_suffix(".db-shm").unlink(missing_ok=True)
+
+
+def test_semantic_search_reads_blob_and_legacy_json_rows(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "blob.db")
+    user_id = "user-blob"
+    meta = NoteMetadata(title="Note", folder_path="misc", tags=[])
+    new_note = storage.save_note(user_id=user_id, content="new", metadata=meta)
+    old_note = storage.save_note(user_id=user_id, content="old", metadata=meta)
+    for note_id, vec in ((new_note, [1.0, 0.0]), (old_note, [0.0, 1.0])):
+        storage.upsert_note_embedding(
+            user_id=user_id,
+            note_id=note_id,
+            embedding_model="text-embedding-3-small",
+            content_hash=note_id,
+            embedding_value=vector_to_json(vec),
+        )
+
+    # Simulate a row written before embedding_blob existed.
+    with storage._session_scope() as session:  # noqa: SLF001 - test helper
+        row = session.query(NoteEmbeddingORM).filter(NoteEmbeddingORM.note_id == old_note).one()
+        assert row.embedding_blob is not None
+        row.embedding_blob = None
+
+    hits = storage.semantic_search(
+        user_id=user_id, query_embedding_literal=vector_to_json([0.0, 1.0]), limit=2
+    )
+    assert [h["note_id"] for h in hits] == [old_note, new_note]
+    assert hits[0]["score"] == 1.0
+
+
+def test_embedding_matrix_rebuild_only_reads_changed_rows(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "incremental.db")
+    user_id = "user-inc"
+    meta = NoteMetadata(title="Note", folder_path="misc", tags=[])
+    kept = storage.save_note(user_id=user_id, content="kept", metadata=meta)
+    changed = storage.save_note(user_id=user_id, content="changed", metadata=meta)
+
+    def embed(note_id: str, content_hash: str, vec: list[float]) -> None:
+        storage.upsert_note_embedding(
+            user_id=user_id,
+            note_id=note_id,
+            embedding_model="text-embedding-3-small",
+            content_hash=content_hash,
+            embedding_value=vector_to_json(vec),
+        )
+
+    embed(kept, "k1", [1.0, 0.0])
+    embed(changed, "c1", [0.0, 1.0])
+    query = vector_to_json([1.0, 0.0])
+    assert storage.semantic_search(user_id=user_id, query_embedding_literal=query, limit=1)[0][
+        "note_id"
+    ] == kept
+
+    # Overwrite the stored vector behind the cache's back: an unchanged content_hash
+    # means the rebuild copies the row from the old matrix instead of re-reading it.
+    with storage._session_scope() as session:  # noqa: SLF001 - test helper
+        row = session.query(NoteEmbeddingORM).filter(NoteEmbeddingORM.note_id == kept).one()
+        row.embedding_blob = None
+        row.embedding = vector_to_json([0.0, 1.0])
+    embed(changed, "c2", [0.6, 0.8])
+
+    hits = storage.semantic_search(user_id=user_id, query_embedding_literal=query, limit=2)
+    assert [h["note_id"] for h in hits] == [kept, changed]
+    assert hits[1]["score"] == pytest.approx(0.8)
+
+    storage.upsert_note_embeddings_bulk(
+        user_id,
+        "text-embedding-3-small",
+        [
+            {"note_id": kept, "content_hash": "k2", "embedding_value": vector_to_json([0.0, 1.0])},
+            {"note_id": changed, "content_hash": "c3", "embedding_value": vector_to_json([1.0, 0.0])},
+        ],
+    )
+    hits = storage.semantic_search(user_id=user_id, query_embedding_literal=query, limit=2)
+    assert [h["note_id"] for h in hits] == [changed, kept]
+    with storage._session_scope() as session:  # noqa: SLF001 - test helper
+        assert session.query(NoteEmbeddingORM).count() == 2
+
+
 def test_retrieve_for_question_applies_time_and_tag_filters() -> None:
     test_db = Path("test_ask_filters.db").resolve()
     test_db.unlink(missing_ok=True)
@@ -159,8 +308,129 @@ def test_retrieve_for_question_applies_time_and_tag_filters() -> None:
     test_db.with_suffix(".db-shm").unlink(missing_ok=True)
 
 
+def test_retrieve_for_question_fuses_ranks(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "rrf.db")
+    user_id = "user-rrf"
+    meta = NoteMetadata(title="Note", folder_path="misc", tags=[])
+    both = storage.save_note(user_id=user_id, content="kayak trip on the lake", metadata=meta)
+    semantic_only = storage.save_note(user_id=user_id, content="paddling notes", metadata=meta)
+    for note_id, vec in ((both, [1.0, 0.0]), (semantic_only, [0.9, 0.1])):
+        storage.upsert_note_embedding(
+            user_id=user_id,
+            note_id=note_id,
+            embedding_model="text-embedding-3-small",
+            content_hash=note_id,
+            embedding_value=vector_to_json(vec),
+        )
+
+    results = storage.retrieve_for_question(
+        user_id=user_id,
+        fts_query="kayak",
+        query_embedding_literal=vector_to_json([1.0, 0.0]),
+        limit=5,
+    )
+
+    assert [r["note"].id for r in results] == [both, semantic_only]
+    # Ranked first in both lists -> the top of the scale.
+    assert results[0]["score"] == pytest.approx(1.0)
+    assert 0.0 < results[1]["score"] < results[0]["score"]
+    assert results[1]["fts_score"] == 0.0
+    assert results[1]["snippet"] == "paddling notes"
+
+    # A zero query embedding carries no ranking signal: keywords alone decide, and
+    # with no keywords either nothing is retrieved.
+    zero = vector_to_json([0.0, 0.0])
+    keyword_only = storage.retrieve_for_question(
+        user_id=user_id, fts_query="kayak", query_embedding_literal=zero, limit=5
+    )
+    assert [(r["note"].id, r["semantic_score"]) for r in keyword_only] == [(both, 0.0)]
+    assert storage.retrieve_for_question(
+        user_id=user_id, fts_query="  ", query_embedding_literal=zero
+    ) == []
+
+    # A keyword query of only stopwords ("the" does occur in `both`) skips FTS.
+    stopwords_only = storage.retrieve_for_question(
+        user_id=user_id,
+        fts_query="the",
+        query_embedding_literal=vector_to_json([1.0, 0.0]),
+        limit=5,
+    )
+    assert [r["note"].id for r in stopwords_only] == [both, semantic_only]
+    assert all(r["fts_score"] == 0.0 for r in stopwords_only)
+    assert storage.retrieve_for_question(
+        user_id=user_id, fts_query="what is the", query_embedding_literal=zero
+    ) == []
+
+
+def test_retrieve_for_question_filters_fts_before_limit(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "fts_filter.db")
+    user_id = "user-fts-filter"
+    for i in range(6):
+        storage.save_note(
+            user_id=user_id,
+            content=f"kayak kayak {i}",
+            metadata=NoteMetadata(title="Kayak", folder_path="misc", tags=[]),
+        )
+    trip = storage.save_note(
+        user_id=user_id,
+        content="rented a kayak",
+        metadata=NoteMetadata(title="Trip", folder_path="trips", tags=[]),
+    )
+
+    # limit=1 keeps only the top 5 FTS hits; all of them would be outside "trips".
+    results = storage.retrieve_for_question(
+        user_id=user_id,
+        fts_query="kayak",
+        query_embedding_literal=vector_to_json([0.0, 0.0]),
+        folder_paths=["trips"],
+        limit=1,
+    )
+    assert [r["note"].id for r in results] == [trip]
+    assert storage.search_notes(user_id, "kayak", candidate_note_ids=[]) == []
+
+
+def test_retrieve_for_question_semantic_cache(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "semcache.db")
+    user_id = "user-cache"
+    meta = NoteMetadata(title="Note", folder_path="misc", tags=[])
+    note_id = storage.save_note(user_id=user_id, content="sourdough starter", metadata=meta)
+    storage.upsert_note_embedding(
+        user_id=user_id,
+        note_id=note_id,
+        embedding_model="text-embedding-3-small",
+        content_hash="h",
+        embedding_value=vector_to_json([1.0, 0.0]),
+    )
+
+    def ask(vec: list[float], fts_query: str = "sourdough") -> list:
+        return storage.retrieve_for_question(
+            user_id=user_id, fts_query=fts_query, query_embedding_literal=vector_to_json(vec)
+        )
+
+    first = ask([1.0, 0.0])
+    assert [r["note"].id for r in first] == [note_id]
+
+    # A near-duplicate question with the same keywords is served from the cache, so it
+    # does not notice a search that would now come back empty.
+    storage.search_notes = lambda *args, **kwargs: []  # type: ignore[method-assign]
+    cached = ask([0.99, 0.05], fts_query=" Sourdough ")
+    assert cached == first
+    # Callers get their own payload dicts, not the cached ones.
+    cached[0]["snippet"] = "edited"
+    assert ask([1.0, 0.0])[0]["snippet"] == first[0]["snippet"]
+    # Different keywords feed a different FTS list, so they miss the cache.
+    assert ask([0.99, 0.05], fts_query="starter")[0]["fts_score"] == 0.0
+    # Below the similarity threshold the retrieval runs again.
+    assert ask([0.0, 1.0])[0]["fts_score"] == 0.0
+
+    # Any note write changes the watermark and invalidates the cached results.
+    storage.update_note(user_id, note_id, content="rye sourdough starter")
+    assert ask([1.0, 0.0])[0]["note"].content == "rye sourdough starter"
+
+
 if __name__ == "__main__":
     test_semantic_search_is_user_scoped()
+    test_semantic_search_sees_reembedded_notes()
     test_retrieve_for_question_applies_time_and_tag_filters()
     print("✅ Ask tests passed")
 
@@ -9,12 +9,17 @@ Tests all core functionality:
 """
 
 import sys
+from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+import pytest
+
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from app.services.storage import NoteStorage
+from app.services import storage as storage_module
+from app.services.storage import NoteStorage, _coerce_datetime
 from app.services.models import NoteMetadata
 
 TEST_USER_ID = "test-user"
@@ -309,6 +314,654 @@ Essential patterns for React hooks:
     return True
 
 
+def test_save_notes_bulk_preserves_order_and_indexes_fts(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "bulk_notes.db")
+
+    note_ids = storage.save_notes_bulk(
+        TEST_USER_ID,
+        [
+            ("First bulk note about kayaks", NoteMetadata(title="Kayak", folder_path="outdoors", tags=["water"])),
+            ("Second bulk note about tents", NoteMetadata(title="Tent", folder_path="outdoors", tags=[])),
+        ],
+    )
+
+    assert len(note_ids) == 2
+    notes = storage.get_notes_by_ids(TEST_USER_ID, note_ids)
+    assert [n.title for n in notes] == ["Kayak", "Tent"]
+    assert notes[0].tags == ["water"]
+    assert notes[1].word_count == 5
+    previews = storage.get_notes_by_ids(TEST_USER_ID, note_ids, content_chars=12)
+    assert [n.content for n in previews] == ["First bulk n", "Second bulk "]
+    assert previews[1].word_count == 5
+    assert [r.note.id for r in storage.search_notes(TEST_USER_ID, "kayaks")] == [note_ids[0]]
+    assert storage.save_notes_bulk(TEST_USER_ID, []) == []
+
+
+def test_create_audio_clips_pending_bulk(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "bulk_clips.db")
+
+    clips = storage.create_audio_clips_pending_bulk(
+        TEST_USER_ID,
+        [
+            {"clip_id": "clip-1", "mime_type": "audio/webm", "bytes": 10, "storage_key": "k/1", "note_id": None},
+            {"mime_type": "audio/mpeg", "bytes": 20, "storage_key": "k/2", "duration_ms": 1500},
+        ],
+    )
+
+    assert [c.id for c in clips][0] == "clip-1"
+    assert all(c.status == "pending" for c in clips)
+    stored = storage.get_audio_clip(TEST_USER_ID, clips[1].id)
+    assert stored is not None
+    assert stored.storage_key == "k/2"
+    assert stored.duration_ms == 1500
+
+    # Both clips share one created_at; backdate them past the stale cutoff and page
+    # through with the (created_at, id) cursor.
+    from app.database import AudioClip as AudioClipORM
+
+    with storage._session_scope() as session:  # noqa: SLF001 - test helper
+        session.query(AudioClipORM).update({"created_at": datetime(2025, 1, 1)})
+    first_page = storage.list_stale_pending_audio_clips(TEST_USER_ID, limit=1)
+    last = first_page[-1]
+    second_page = storage.list_stale_pending_audio_clips(
+        TEST_USER_ID, limit=1, after=(last.created_at, last.id)
+    )
+    assert sorted(c.id for c in first_page + second_page) == sorted(c.id for c in clips)
+    assert storage.list_stale_pending_audio_clips(
+        TEST_USER_ID, after=(second_page[0].created_at, second_page[0].id)
+    ) == []
+
+
+def test_fts_tracks_updates_and_deletes(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "fts_sync.db")
+    meta = NoteMetadata(title="Garden plan", folder_path="home", tags=["garden"])
+    keep_id = storage.save_note(TEST_USER_ID, "Plant tomatoes in spring", meta)
+    drop_id = storage.save_note(TEST_USER_ID, "Plant tulips in autumn", meta)
+
+    storage.update_note(TEST_USER_ID, keep_id, content="Plant peppers in spring")
+    storage.delete_note(TEST_USER_ID, drop_id)
+    # note_tags rows go with the note through ON DELETE CASCADE.
+    assert [n.id for n in storage.get_notes_by_tag(TEST_USER_ID, "garden")] == [keep_id]
+
+    assert storage.search_notes(TEST_USER_ID, "tomatoes") == []
+    assert storage.search_notes(TEST_USER_ID, "tulips") == []
+    hits = storage.search_notes(TEST_USER_ID, "peppers")
+    assert [h.note.id for h in hits] == [keep_id]
+    assert "<mark>peppers</mark>" in hits[0].snippet
+
+    # Title matches are weighted above content matches.
+    in_title = storage.save_note(
+        TEST_USER_ID, "notes", NoteMetadata(title="Peppers", folder_path="home", tags=[])
+    )
+    assert [h.note.id for h in storage.search_notes(TEST_USER_ID, "peppers")] == [
+        in_title,
+        keep_id,
+    ]
+
+    with storage.engine.begin() as conn:
+        conn.exec_driver_sql(
+            f"INSERT INTO {storage.sqlite_fts_table}({storage.sqlite_fts_table}) VALUES('integrity-check')"
+        )
+
+
+def test_bulk_ingest_rebuilds_fts_and_restores_triggers(tmp_path: Path) -> None:
+    db_path = tmp_path / "bulk_ingest.db"
+    storage = NoteStorage(db_path=db_path)
+    meta = NoteMetadata(title="Import", folder_path="imports", tags=["import"])
+
+    with storage.bulk_ingest():
+        ids = storage.save_notes_bulk(
+            TEST_USER_ID, [(f"imported walrus {i}", meta) for i in range(25)]
+        )
+        with storage.engine.connect() as conn:
+            triggers = conn.exec_driver_sql(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger'"
+            ).scalar_one()
+        assert triggers == 0
+
+    hits = storage.search_notes(TEST_USER_ID, "walrus", limit=50)
+    assert {h.note.id for h in hits} == set(ids)
+
+    # Triggers are back, so regular writes are indexed again.
+    note_id = storage.save_note(TEST_USER_ID, "a lone narwhal", meta)
+    assert [h.note.id for h in storage.search_notes(TEST_USER_ID, "narwhal")] == [note_id]
+
+
+def test_interrupted_bulk_ingest_is_repaired_on_startup(tmp_path: Path) -> None:
+    db_path = tmp_path / "bulk_crash.db"
+    storage = NoteStorage(db_path=db_path)
+    meta = NoteMetadata(title="Import", folder_path="imports", tags=[])
+
+    # Simulate a process dying mid-import: triggers dropped, exit never runs.
+    with storage.engine.begin() as conn:
+        storage_module._drop_fts_triggers(conn)  # noqa: SLF001 - test helper
+    note_id = storage.save_note(TEST_USER_ID, "orphaned platypus", meta)
+    assert storage.search_notes(TEST_USER_ID, "platypus") == []
+    storage.engine.dispose()
+
+    storage_module._SQLITE_SCHEMA_CACHE.clear()  # noqa: SLF001 - fresh process
+    restarted = NoteStorage(db_path=db_path)
+    assert [h.note.id for h in restarted.search_notes(TEST_USER_ID, "platypus")] == [note_id]
+
+
+def test_fts_index_is_rebuilt_when_note_rowids_move(tmp_path: Path) -> None:
+    from app.services import storage as storage_module
+
+    db_path = tmp_path / "vacuumed.db"
+    storage = NoteStorage(db_path=db_path)
+    meta = NoteMetadata(title="Note", folder_path="misc", tags=[])
+    kayak = storage.save_note(TEST_USER_ID, "kayak on the lake", meta)
+    storage.save_note(TEST_USER_ID, "tent at the campsite", meta)
+
+    # What VACUUM may do to a table without an INTEGER PRIMARY KEY.
+    with storage.engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE notes SET rowid = rowid + 100")
+    storage.engine.dispose()
+
+    storage_module._SQLITE_SCHEMA_CACHE.clear()  # noqa: SLF001 - fresh process
+    restarted = NoteStorage(db_path=db_path)
+    assert [h.note.id for h in restarted.search_notes(TEST_USER_ID, "kayak")] == [kayak]
+
+
+def test_note_embedding_unique_key_is_backfilled_on_old_databases(tmp_path: Path) -> None:
+    db_path = tmp_path / "embedding_key.db"
+    storage = NoteStorage(db_path=db_path)
+    with storage.engine.connect() as conn:
+        names = [row[1] for row in conn.exec_driver_sql("PRAGMA index_list(note_embeddings)")]
+    # Fresh tables carry the key as a UNIQUE constraint, not a second named index.
+    assert "uq_note_embeddings_user_note_model" not in names
+
+    # Simulate a table created before the key existed, holding a duplicate.
+    with storage.engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE ne_old AS SELECT * FROM note_embeddings")
+        conn.exec_driver_sql("DROP TABLE note_embeddings")
+        conn.exec_driver_sql("ALTER TABLE ne_old RENAME TO note_embeddings")
+        for row_id, content_hash in (("e1", "old"), ("e2", "new")):
+            conn.exec_driver_sql(
+                "INSERT INTO note_embeddings (id, user_id, note_id, embedding_model, "
+                "content_hash, embedding, created_at, updated_at) "
+                f"VALUES ('{row_id}', 'u', 'n', 'm', '{content_hash}', '[1.0]', "
+                "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+            )
+    storage.engine.dispose()
+    storage_module._SQLITE_SCHEMA_CACHE.clear()  # noqa: SLF001 - fresh process
+    storage = NoteStorage(db_path=db_path)
+
+    with storage.engine.connect() as conn:
+        names = [row[1] for row in conn.exec_driver_sql("PRAGMA index_list(note_embeddings)")]
+        hashes = conn.exec_driver_sql("SELECT content_hash FROM note_embeddings").scalars().all()
+    assert "uq_note_embeddings_user_note_model" in names
+    assert hashes == ["new"]
+
+
+def test_sqlite_connections_use_tuned_pragmas(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "pragmas.db")
+    with storage.engine.connect() as conn:
+        values = {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ("journal_mode", "synchronous", "temp_store", "cache_size", "foreign_keys")
+        }
+    assert values == {
+        "journal_mode": "wal",
+        "synchronous": 1,  # NORMAL
+        "temp_store": 2,  # MEMORY
+        "cache_size": -65536,
+        "foreign_keys": 1,
+    }
+
+
+def test_coerce_datetime_parses_sqlite_and_iso_strings() -> None:
+    assert _coerce_datetime("2025-02-15 12:30:45") == datetime(2025, 2, 15, 12, 30, 45)
+    assert _coerce_datetime("2025-02-15 12:30:45.123456") == datetime(
+        2025, 2, 15, 12, 30, 45, 123456
+    )
+    assert _coerce_datetime("2025-02-15T12:30:45") == datetime(2025, 2, 15, 12, 30, 45)
+    assert _coerce_datetime("2025-02-15T12:30:45Z").utcoffset() == timedelta(0)
+    assert _coerce_datetime("not a date") is None
+    assert _coerce_datetime(None) is None
+
+
+def test_pk_lookups_enforce_owner(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "owner.db")
+    note_id = storage.save_note(
+        TEST_USER_ID, "private", NoteMetadata(title="Mine", folder_path="a", tags=[])
+    )
+    clip = storage.create_audio_clip_pending(
+        user_id=TEST_USER_ID,
+        clip_id="clip-owned",
+        note_id=note_id,
+        mime_type="audio/webm",
+        bytes=10,
+        duration_ms=None,
+        storage_key="k",
+        bucket="b",
+    )
+
+    assert storage.get_note("intruder", note_id) is None
+    assert storage.update_note("intruder", note_id, content="hijacked") is False
+    assert storage.update_note_returning("intruder", note_id, content="hijacked") is None
+    assert storage.get_audio_clip("intruder", clip.id) is None
+    assert storage.mark_audio_clip_ready("intruder", clip.id) is None
+    assert storage.mark_audio_clip_failed("intruder", clip.id) is None
+    assert storage.get_note(TEST_USER_ID, note_id).content == "private"
+    updated = storage.update_note_returning(TEST_USER_ID, note_id, content="still private")
+    assert (updated.content, updated.word_count) == ("still private", 2)
+    assert storage.get_note(TEST_USER_ID, note_id) == updated
+    assert storage.get_audio_clip(TEST_USER_ID, clip.id).status == "pending"
+    assert storage.list_audio_clips_for_note("intruder", note_id) == []
+    assert [c.id for c in storage.list_audio_clips_for_note(TEST_USER_ID, note_id)] == [clip.id]
+    assert storage.get_primary_audio_clip_for_note(TEST_USER_ID, note_id) is None
+    ready = storage.mark_audio_clip_ready(TEST_USER_ID, clip.id, duration_ms=1200)
+    assert (ready.status, ready.duration_ms, ready.storage_key) == ("ready", 1200, "k")
+    assert storage.get_primary_audio_clip_for_note(TEST_USER_ID, note_id) == ready
+
+
+def test_cached_list_statements_rebind_values(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "lambda.db")
+    note_id = storage.save_note(
+        TEST_USER_ID, "todo source", NoteMetadata(title="T", folder_path="a", tags=[])
+    )
+    done = storage.create_todo(TEST_USER_ID, "done", note_id=note_id, status="completed")
+    open_ = storage.create_todo(TEST_USER_ID, "open", status="accepted")
+    storage.create_todo("other-user", "theirs", status="accepted")
+
+    # Same code paths, different filter values and combinations: the cached
+    # statements must pick up each call's values.
+    assert [t.id for t in storage.list_todos(TEST_USER_ID, status="completed")] == [done.id]
+    assert [t.id for t in storage.list_todos(TEST_USER_ID, status="accepted")] == [open_.id]
+    assert [t.id for t in storage.list_todos(TEST_USER_ID, note_id=note_id)] == [done.id]
+    assert len(storage.list_todos(TEST_USER_ID)) == 2
+    assert len(storage.list_todos(TEST_USER_ID, limit=1)) == 1
+    assert len(storage.list_todos(TEST_USER_ID, limit=1, offset=1)) == 1
+    assert [t.id for t in storage.list_todos_for_note(TEST_USER_ID, note_id)] == [done.id]
+    assert storage.get_todo("other-user", done.id) is None
+
+    first = storage.save_digest(TEST_USER_ID, "first")
+    storage.save_digest("other-user", "theirs")
+    assert [d.id for d in storage.list_digests(TEST_USER_ID)] == [first]
+    assert storage.list_digests("other-user")[0].content == "theirs"
+    assert storage.get_digest("other-user", first) is None
+
+
+def test_todo_transitions_use_single_updates(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "todo_updates.db")
+    a = storage.create_todo(TEST_USER_ID, "a")
+    b = storage.create_todo(TEST_USER_ID, "b")
+
+    edited = storage.update_todo(TEST_USER_ID, a.id, description="details")
+    assert (edited.title, edited.description) == ("a", "details")
+    assert storage.accept_todo(TEST_USER_ID, a.id).status == "accepted"
+    done = storage.complete_todo(TEST_USER_ID, a.id)
+    assert done.status == "completed" and done.completed_at is not None
+    assert storage.accept_todo("intruder", b.id) is None
+    assert storage.update_todo("intruder", b.id, title="x") is None
+
+    assert storage.accept_todos_bulk("intruder", [b.id]) == 0
+    assert storage.accept_todos_bulk(TEST_USER_ID, [a.id, b.id]) == 1
+    assert storage.complete_todos_bulk(TEST_USER_ID, [a.id, b.id, "missing"]) == 1
+    assert storage.get_todo(TEST_USER_ID, b.id).status == "completed"
+
+    created = storage.create_todos_bulk(
+        TEST_USER_ID, [{"title": "c", "status": "accepted"}, {"title": "d", "confidence": 0.5}]
+    )
+    assert [(t.title, t.status) for t in created] == [("c", "accepted"), ("d", "suggested")]
+    assert storage.get_todo(TEST_USER_ID, created[1].id).confidence == 0.5
+
+
+def test_listings_read_in_index_order(tmp_path: Path) -> None:
+    from app.services import storage as storage_module
+
+    db_path = tmp_path / "todo_idx.db"
+    storage = NoteStorage(db_path=db_path)
+    # Simulate a database from before the widened indexes.
+    with storage.engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX idx_todos_user_status_created")
+        conn.exec_driver_sql("CREATE INDEX idx_todos_user_status ON todos (user_id, status)")
+    storage.engine.dispose()
+    storage_module._SQLITE_SCHEMA_CACHE.clear()  # noqa: SLF001 - fresh process
+    storage = NoteStorage(db_path=db_path)
+
+    with storage.engine.connect() as conn:
+        plan = " ".join(
+            row[3]
+            for row in conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT * FROM todos WHERE user_id = 'u' "
+                "AND status = 'accepted' ORDER BY created_at DESC"
+            )
+        )
+    assert "idx_todos_user_status_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+    with storage.engine.connect() as conn:
+        plan = " ".join(
+            row[3]
+            for row in conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT * FROM meal_entries WHERE user_id = 'u' "
+                "AND meal_date BETWEEN '2025-01-01' AND '2025-01-31' "
+                "ORDER BY meal_date DESC, created_at DESC"
+            )
+        )
+    assert "idx_meal_entries_user_date_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_candidate_filter_matches_multiple_folder_trees(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "folders.db")
+    ids = {
+        path: storage.save_note(
+            TEST_USER_ID, path, NoteMetadata(title=path, folder_path=path, tags=[])
+        )
+        for path in (
+            "work", "work/meetings", "work-old", "work0", "home/garden", "homework", "misc"
+        )
+    }
+
+    found = storage._filter_candidate_note_ids(  # noqa: SLF001 - filter semantics
+        TEST_USER_ID, folder_paths=["work", "home"]
+    )
+    assert set(found) == {ids["work"], ids["work/meetings"], ids["home/garden"]}
+    found = storage._filter_candidate_note_ids(  # noqa: SLF001 - filter semantics
+        TEST_USER_ID, folder_paths=["work"]
+    )
+    assert set(found) == {ids["work"], ids["work/meetings"]}
+
+
+def test_folder_filter_is_case_sensitive(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "folder_case.db")
+    ids = {
+        path: storage.save_note(
+            TEST_USER_ID, path, NoteMetadata(title=path, folder_path=path, tags=[])
+        )
+        for path in ("Work", "Work/Meetings", "work/notes")
+    }
+
+    # Like Postgres' LIKE and the exact-match branch, subfolders match by exact case.
+    found = storage._filter_candidate_note_ids(  # noqa: SLF001 - filter semantics
+        TEST_USER_ID, folder_paths=["Work"]
+    )
+    assert set(found) == {ids["Work"], ids["Work/Meetings"]}
+
+
+def test_pg_semantic_search_joins_candidate_select(tmp_path: Path) -> None:
+    from sqlalchemy.dialects import postgresql
+
+    from app.services.storage import _pg_semantic_search_in_select
+
+    storage = NoteStorage(db_path=tmp_path / "candidates.db")
+    candidates = storage._candidate_notes_select(  # noqa: SLF001 - filter statement
+        TEST_USER_ID, folder_paths=["work"]
+    )
+    assert candidates is not None
+    sql = str(
+        _pg_semantic_search_in_select(candidates, TEST_USER_ID, "m", "[1,0]", 5).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    assert "WITH filtered AS" in sql
+    assert "JOIN filtered ON filtered.id = note_embeddings.note_id" in sql
+    assert storage._candidate_notes_select(TEST_USER_ID) is None  # noqa: SLF001
+
+
+def test_pg_hybrid_retrieve_fuses_in_one_statement() -> None:
+    from sqlalchemy.dialects import postgresql
+
+    from app.services.storage import _pg_hybrid_retrieve_select
+
+    sql = str(
+        _pg_hybrid_retrieve_select(TEST_USER_ID, "m", "[1,0]", "kayak", None, 60, 60, 12).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    assert "FROM sem FULL OUTER JOIN fts ON sem.note_id = fts.note_id" in sql
+    assert "FROM notes JOIN fused ON fused.note_id = notes.id" in sql
+    assert "filtered" not in sql
+
+
+def test_storage_instances_share_engine_per_url(tmp_path: Path) -> None:
+    first = NoteStorage(db_path=tmp_path / "shared.db")
+    second = NoteStorage(db_path=tmp_path / "shared.db")
+    assert first.engine is second.engine
+    assert first.session_factory is second.session_factory
+    assert NoteStorage(db_path=tmp_path / "other.db").engine is not first.engine
+
+
+def test_evicted_engines_are_disposed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(storage_module, "_ENGINES_MAX_ENTRIES", 1)
+    first = NoteStorage(db_path=tmp_path / "first.db")
+    pool = first.engine.pool
+    second = NoteStorage(db_path=tmp_path / "second.db")
+    assert list(storage_module._ENGINES) == [str(second.engine.url)]  # noqa: SLF001
+    # dispose() swaps in a fresh pool after closing the old one's connections.
+    assert first.engine.pool is not pool
+
+
+def test_read_only_session_scope_does_not_commit(tmp_path: Path) -> None:
+    from app.database import Note as NoteORM
+
+    storage = NoteStorage(db_path=tmp_path / "readonly.db")
+    note_id = storage.save_note(
+        TEST_USER_ID, "body", NoteMetadata(title="Kept", folder_path="misc", tags=[])
+    )
+    with storage._session_scope(write=False) as session:  # noqa: SLF001 - test helper
+        session.get(NoteORM, note_id).title = "Discarded"
+    assert storage.get_note(TEST_USER_ID, note_id).title == "Kept"
+
+
+def test_user_settings_upsert(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "settings.db")
+
+    created = storage.update_user_settings(TEST_USER_ID, auto_accept_todos=True)
+    assert created.auto_accept_todos is True
+    # Omitted fields keep their stored value on conflict.
+    touched = storage.update_user_settings(TEST_USER_ID)
+    assert (touched.id, touched.auto_accept_todos) == (created.id, True)
+    assert storage.update_user_settings(TEST_USER_ID, auto_accept_todos=False).id == created.id
+
+    defaults = storage.get_user_settings("new-user")
+    assert defaults.auto_accept_todos is False
+    assert storage.get_user_settings("new-user").id == defaults.id
+
+
+def test_meal_embedding_upsert_and_entry_delete(tmp_path: Path) -> None:
+    from app.database import MealEmbedding, MealItem
+    from app.services.models import MealEntryMetadata
+
+    storage = NoteStorage(db_path=tmp_path / "meals.db")
+    meal_id = storage.save_meal_entry(
+        TEST_USER_ID,
+        "two eggs and toast",
+        MealEntryMetadata(meal_type="breakfast", meal_date="2025-01-01"),
+        [{"name": "eggs"}, {"name": "toast"}],
+    )
+    for content_hash in ("v1", "v2"):
+        storage.upsert_meal_embedding(
+            user_id=TEST_USER_ID,
+            meal_entry_id=meal_id,
+            embedding_model="text-embedding-3-small",
+            content_hash=content_hash,
+            embedding_value="[1.0, 0.0]",
+        )
+    with storage._session_scope() as session:  # noqa: SLF001 - test helper
+        assert [e.content_hash for e in session.query(MealEmbedding)] == ["v2"]
+
+    [listed] = storage.list_meals_by_date_range(TEST_USER_ID, "2025-01-01", "2025-01-02")
+    assert listed.transcription == "two eggs and toast"
+    assert sorted(i.name for i in listed.items) == ["eggs", "toast"]
+    [slim] = storage.list_meals_by_date_range(
+        TEST_USER_ID, "2025-01-01", "2025-01-02", include_transcription=False
+    )
+    assert (slim.transcription, slim.meal_date) == ("", "2025-01-01")
+
+    storage.save_meal_entry(
+        TEST_USER_ID, "apple", MealEntryMetadata(meal_type="snack", meal_date="2025-01-03")
+    )
+    calendar = storage.get_meals_calendar(TEST_USER_ID, 2025, 1)
+    assert list(calendar) == ["2025-01-03", "2025-01-01"]
+    assert calendar["2025-01-01"] == [{"id": meal_id, "meal_type": "breakfast", "item_count": 2}]
+    assert calendar["2025-01-03"][0]["item_count"] == 0
+
+    fetched = storage.get_meal_entry(TEST_USER_ID, meal_id)
+    assert fetched.transcription == "two eggs and toast" and len(fetched.items) == 2
+    assert storage.get_meal_entry("intruder", meal_id) is None
+    toast = next(i for i in fetched.items if i.name == "toast")
+    assert storage.update_meal_item("intruder", toast.id, name="bagel") is None
+    assert storage.update_meal_item(TEST_USER_ID, toast.id, name="bagel").name == "bagel"
+    assert storage.delete_meal_item("intruder", toast.id) is False
+    assert storage.delete_meal_item(TEST_USER_ID, toast.id) is True
+    assert storage.add_meal_item("intruder", meal_id, "bacon") is None
+    added = storage.add_meal_item(TEST_USER_ID, meal_id, "bacon", portion="2 strips")
+    assert (added.meal_entry_id, added.portion) == (meal_id, "2 strips")
+    assert sorted(
+        (i.name, i.portion) for i in storage.get_meal_entry(TEST_USER_ID, meal_id).items
+    ) == [("bacon", "2 strips"), ("eggs", None)]
+
+    assert storage.delete_meal_entry("intruder", meal_id) is False
+    assert storage.delete_meal_entry(TEST_USER_ID, meal_id) is True
+    with storage._session_scope() as session:  # noqa: SLF001 - test helper
+        assert session.query(MealEmbedding).count() == 0
+        assert session.query(MealItem).count() == 0
+
+
+def test_delete_audio_clips_returning_reports_storage_keys(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "clip_delete.db")
+    storage.create_audio_clips_pending_bulk(
+        TEST_USER_ID,
+        [
+            {"clip_id": "c1", "note_id": "n1", "mime_type": "audio/webm", "bytes": 1,
+             "duration_ms": None, "storage_key": "k1", "bucket": "b"},
+            {"clip_id": "c2", "note_id": "n1", "mime_type": "audio/webm", "bytes": 1,
+             "duration_ms": None, "storage_key": "k2", "bucket": "b"},
+            {"clip_id": "c3", "note_id": "n2", "mime_type": "audio/webm", "bytes": 1,
+             "duration_ms": None, "storage_key": "k3", "bucket": "b"},
+        ],
+    )
+
+    assert storage.delete_audio_clips_returning("intruder", note_id="n1") == []
+    deleted = storage.delete_audio_clips_returning(TEST_USER_ID, note_id="n1")
+    assert sorted(d["storage_key"] for d in deleted) == ["k1", "k2"]
+    assert storage.list_audio_clips_for_note(TEST_USER_ID, "n1") == []
+    assert storage.delete_audio_clip(TEST_USER_ID, "c3") is True
+    assert storage.delete_audio_clip(TEST_USER_ID, "c3") is False
+
+
+def test_parse_embedding_formats(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "parse.db")
+    parse = storage._parse_embedding  # noqa: SLF001 - unit under test
+
+    assert parse("[0.5, -1, 2e-3]").tolist() == pytest.approx([0.5, -1.0, 0.002])
+    assert parse(b"[1,2]").tolist() == [1.0, 2.0]
+    assert parse("[1.0,2.0]::vector").tolist() == [1.0, 2.0]
+    assert parse([3, 4]).dtype == np.float32
+    for bad in (None, "", "[]", "not json", '{"a": 1}', "[[1, 2]]", '["x"]', 7):
+        assert parse(bad).size == 0
+
+
+def test_folder_tree_cache_tracks_note_changes(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "folder_cache.db")
+    note_id = storage.save_note(
+        TEST_USER_ID, "a", NoteMetadata(title="A", folder_path="work/projects", tags=[])
+    )
+
+    first = storage.get_folder_tree(TEST_USER_ID)
+    assert storage.get_folder_tree(TEST_USER_ID) is first
+
+    storage.update_note(
+        TEST_USER_ID, note_id, metadata=NoteMetadata(title="A", folder_path="home", tags=[])
+    )
+    moved = storage.get_folder_tree(TEST_USER_ID)
+    assert [f.path for f in moved.subfolders] == ["home"]
+
+    storage.delete_note(TEST_USER_ID, note_id)
+    assert storage.get_folder_tree(TEST_USER_ID).subfolders == []
+
+
+def test_folder_tree_cache_evicts_least_recently_used_user(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(storage_module, "_USER_CACHE_MAX_ENTRIES", 2)
+    storage = NoteStorage(db_path=tmp_path / "folder_cache_lru.db")
+    for user in ("u1", "u2", "u3"):
+        storage.save_note(user, "a", NoteMetadata(title="A", folder_path="work", tags=[]))
+
+    storage.get_folder_tree("u1")
+    storage.get_folder_tree("u2")
+    storage.get_folder_tree("u1")
+    storage.get_folder_tree("u3")
+    assert storage._folder_trees.keys() == ["u1", "u3"]
+
+
+def test_note_tags_follow_updates_and_drive_tag_queries(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "note_tags.db")
+    a = storage.save_note(
+        TEST_USER_ID, "a", NoteMetadata(title="A", folder_path="work", tags=["x", "y", "x"])
+    )
+    b = storage.save_note(TEST_USER_ID, "b", NoteMetadata(title="B", folder_path="work", tags=["y"]))
+    storage.save_note("someone-else", "c", NoteMetadata(title="C", folder_path="work", tags=["z"]))
+
+    assert storage.get_all_tags(TEST_USER_ID) == ["x", "y"]
+    assert {n.id for n in storage.get_notes_by_tag(TEST_USER_ID, "y")} == {a, b}
+    stats = storage.get_folder_stats(TEST_USER_ID, "work")
+    assert stats.note_count == 2
+    assert stats.most_common_tags == ["y", "x"]
+    assert storage.get_folder_stats(TEST_USER_ID, "missing") is None
+    storage.save_note(TEST_USER_ID, "d", NoteMetadata(title="D", folder_path="plain", tags=[]))
+    stats = storage.get_folder_stats(TEST_USER_ID, "plain")
+    assert (stats.note_count, stats.most_common_tags) == (1, [])
+
+    storage.update_note(
+        TEST_USER_ID, a, metadata=NoteMetadata(title="A", folder_path="work", tags=["y", "w"])
+    )
+    assert storage.get_all_tags(TEST_USER_ID) == ["w", "y"]
+    assert storage.get_notes_by_tag(TEST_USER_ID, "x") == []
+
+    ids = storage._filter_candidate_note_ids(  # noqa: SLF001 - filter semantics
+        TEST_USER_ID, include_tags=["y"], exclude_tags=["w"]
+    )
+    assert ids == [b]
+
+    storage.delete_note(TEST_USER_ID, b)
+    assert storage.get_all_tags(TEST_USER_ID) == ["w", "y"]
+    assert [n.id for n in storage.get_notes_by_tag(TEST_USER_ID, "y")] == [a]
+
+
+def test_note_update_resyncs_drifted_note_tags(tmp_path: Path) -> None:
+    storage = NoteStorage(db_path=tmp_path / "drifted_tags.db")
+    note_id = storage.save_note(
+        TEST_USER_ID, "a", NoteMetadata(title="A", folder_path="f", tags=["kept"])
+    )
+    # note_tags out of step with the JSON: a stale row, and the JSON tag missing.
+    with storage.engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM note_tags")
+        conn.exec_driver_sql(
+            "INSERT INTO note_tags (note_id, tag, user_id) "
+            f"VALUES ('{note_id}', 'stale', '{TEST_USER_ID}'), "
+            f"('{note_id}', 'added', '{TEST_USER_ID}')"
+        )
+
+    storage.update_note(
+        TEST_USER_ID, note_id, metadata=NoteMetadata(title="A", folder_path="f", tags=["kept", "added"])
+    )
+    assert storage.get_all_tags(TEST_USER_ID) == ["added", "kept"]
+
+
+def test_note_tags_backfilled_for_existing_database(tmp_path: Path) -> None:
+    from app.services import storage as storage_module
+
+    db_path = tmp_path / "legacy_tags.db"
+    storage = NoteStorage(db_path=db_path)
+    note_id = storage.save_note(
+        TEST_USER_ID, "a", NoteMetadata(title="A", folder_path="f", tags=["legacy"])
+    )
+    with storage.engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE note_tags")
+    storage.engine.dispose()
+
+    storage_module._SQLITE_SCHEMA_CACHE.clear()  # noqa: SLF001 - fresh process
+    restarted = NoteStorage(db_path=db_path)
+    assert restarted.get_all_tags(TEST_USER_ID) == ["legacy"]
+    assert [n.id for n in restarted.get_notes_by_tag(TEST_USER_ID, "legacy")] == [note_id]
+
+
 if __name__ == "__main__":
     try:
         success = test_storage()